@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Замеры скорости основных операций DatabaseManager и calculator на синтетических данных.
+
+Для каждого размера (по умолчанию 1k, 10k и 100k записей) создается база
+с ежедневными записями, заканчивающимися 31.12.2024, ставками, которые
+меняются раз в несколько месяцев, и комментариями заданной длины.
+Затем каждая операция выполняется много раз на случайных днях и месяцах.
+
+Результат печатается таблицей и (с --output) сохраняется в JSON. С --compare
+результаты сравниваются с сохраненными ранее, и скрипт завершается с кодом 1,
+если медиана какой-либо операции выросла больше допустимого.
+
+Примеры:
+    python benchmarks/db_benchmark.py --output bench.json
+    python benchmarks/db_benchmark.py --sizes 1000,10000 --compare bench.json --threshold 1.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "work_timer_flet")
+sys.path.insert(0, APP_DIR)
+
+from calculator import calculate_monthly_summary  # noqa: E402
+from database_manager import DatabaseManager  # noqa: E402
+
+LAST_DAY = date(2024, 12, 31)
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def generate_database(path, rows, comment_size=20, rate_change_months=6, seed=0):
+    """
+    Создает базу с rows ежедневными записями подряд, заканчивающимися LAST_DAY.
+
+    :param comment_size: длина комментария каждой записи в символах (0 - без комментария).
+    :param rate_change_months: ставка меняется раз в столько месяцев (0 - одна ставка на все время).
+    :return: список дат записей (date) в хронологическом порядке.
+    """
+    rng = random.Random(seed)
+    first_day = LAST_DAY - timedelta(days=rows - 1)
+    days = [first_day + timedelta(days=offset) for offset in range(rows)]
+
+    def entries():
+        for day in days:
+            start = datetime(day.year, day.month, day.day, 8) + timedelta(minutes=rng.randint(0, 90))
+            end = start + timedelta(minutes=rng.randint(120, 660))
+            yield start, end, "x" * comment_size
+
+    db_manager = DatabaseManager(db_name=path)
+    db_manager.import_entries(entries())
+
+    year, month = first_day.year, first_day.month
+    months_count = (LAST_DAY.year - year) * 12 + LAST_DAY.month - month + 1
+    step = rate_change_months or months_count
+    for offset in range(0, months_count, step):
+        rate_year, rate_month = divmod(year * 12 + month - 1 + offset, 12)
+        db_manager.save_settings_for_month(rate_year, rate_month + 1, 300 + offset, rng.choice([0, 10000]))
+    db_manager.close()
+    return days
+
+
+def time_operation(operation, arguments):
+    """Выполняет operation(*args) для каждого набора аргументов и возвращает длительности в микросекундах."""
+    durations = []
+    for args in arguments:
+        started = time.perf_counter()
+        operation(*args)
+        durations.append((time.perf_counter() - started) * 1e6)
+    return durations
+
+
+def describe(durations):
+    """Сводные показатели длительностей в микросекундах."""
+    ordered = sorted(durations)
+    return {
+        "ops": len(ordered),
+        "mean_us": round(statistics.fmean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max_us": round(ordered[-1], 1),
+    }
+
+
+def run_scenarios(path, days, operations, seed=0):
+    """
+    Замеряет основные операции на готовой базе.
+    Кэш результатов сбрасывается перед каждым вызовом там, где он иначе
+    скрыл бы стоимость запросов (холодные замеры), и отдельно замеряются
+    повторные (теплые) обращения к сводке.
+    """
+    rng = random.Random(seed)
+    db_manager = DatabaseManager(db_name=path)
+    months = sorted({(day.year, day.month) for day in days})
+    sample_days = [(rng.choice(days),) for _ in range(operations)]
+    sample_months = [rng.choice(months) for _ in range(operations)]
+    # Повторные просмотры последнего года - типичный сценарий, умещающийся в кэш
+    recent_months = [rng.choice(months[-12:]) for _ in range(operations)]
+
+    def cold(func):
+        def call(*args):
+            db_manager.cache.clear()
+            func(*args)
+        return call
+
+    def update_entry(day):
+        start = datetime(day.year, day.month, day.day, 9)
+        db_manager.add_or_update_entry(start, start + timedelta(hours=9), "benchmark")
+
+    scenarios = {
+        "get_entry_by_date": (db_manager.get_entry_by_date, sample_days),
+        "get_entries_for_month": (cold(db_manager.get_entries_for_month), sample_months),
+        "get_settings_for_month": (db_manager.get_settings_for_month, sample_months),
+        "add_or_update_entry": (update_entry, sample_days),
+        "calculate_monthly_summary": (cold(lambda y, m: calculate_monthly_summary(db_manager, y, m)), sample_months),
+        "calculate_monthly_summary_warm": (lambda y, m: calculate_monthly_summary(db_manager, y, m), recent_months),
+        "calculate_monthly_summary_sql": (
+            cold(lambda y, m: calculate_monthly_summary(db_manager, y, m, engine="sql")), sample_months
+        ),
+    }
+    results = {}
+    for name, (operation, arguments) in scenarios.items():
+        if name.endswith("_warm"):
+            # Теплый замер: месяцы выборки уже посчитаны и лежат в кэше
+            time_operation(operation, arguments)
+        results[name] = describe(time_operation(operation, arguments))
+    db_manager.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Сравнивает медианы с сохраненным запуском.
+    :return: список строк с описанием регрессий.
+    """
+    regressions = []
+    for size, scenarios in results["sizes"].items():
+        for name, stats in scenarios.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name)
+            if base and base["p50_us"] > 0 and stats["p50_us"] > base["p50_us"] * threshold:
+                regressions.append(
+                    f"{name} при {size} записей: {stats['p50_us']} мкс против {base['p50_us']} мкс"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры DatabaseManager и calculator на синтетических данных")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Количества записей через запятую (по одной записи в день)")
+    parser.add_argument("--operations", type=int, default=200, help="Вызовов каждой операции на размер")
+    parser.add_argument("--comment-size", type=int, default=20, help="Длина комментария записи")
+    parser.add_argument("--rate-change-months", type=int, default=6, help="Ставка меняется раз в столько месяцев")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора случайных чисел")
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    parser.add_argument("--compare", help="JSON-файл с прошлыми результатами для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Во сколько раз может вырасти медиана, прежде чем это считается регрессией")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "operations": args.operations,
+        "comment_size": args.comment_size,
+        "rate_change_months": args.rate_change_months,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = os.path.join(tmp_dir, f"bench_{size}.db")
+            started = time.perf_counter()
+            days = generate_database(path, size, args.comment_size, args.rate_change_months, args.seed)
+            generated = time.perf_counter() - started
+            print(f"\n{size} записей (база создана за {generated:.1f} с):")
+            scenarios = run_scenarios(path, days, args.operations, args.seed)
+            results["sizes"][str(size)] = scenarios
+            for name, stats in scenarios.items():
+                print(f"  {name:32s} p50 {stats['p50_us']:9.1f} мкс  p95 {stats['p95_us']:9.1f} мкс")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print("\nНайдены регрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nРегрессий нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
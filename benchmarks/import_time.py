@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Замер стоимости импорта main.py при запуске приложения (python -X importtime).
+
+Скрипт несколько раз запускает чистый интерпретатор с импортом main,
+суммирует время импорта модулей верхнего уровня и завершается с кодом 1,
+если лучший результат превышает бюджет или если при запуске импортируются
+модули, которые должны загружаться только по требованию.
+
+Примеры:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 400 --repeat 7 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "work_timer_flet")
+DEFAULT_BUDGET_MS = 500.0
+# Модули, которым не место в критическом пути запуска
+FORBIDDEN_MODULES = ["requests", "packaging", "urllib.request", "http.client", "sqlite3", "numpy"]
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+
+def measure_once(module="main"):
+    """
+    Один запуск интерпретатора с -X importtime.
+    :return: (общее время импорта в мс, {модуль: накопленное время в мс}).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules[name] = cumulative_us / 1000.0
+        # Модули верхнего уровня выводятся с одним пробелом отступа,
+        # их накопленное время уже включает вложенные импорты
+        if len(indent) == 1:
+            total_us += cumulative_us
+    return total_us / 1000.0, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Стоимость импорта main.py при запуске")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков (берется лучший)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Допустимое время импорта, мс")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых дорогих модулей показать")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.repeat)]
+    totals = [total for total, _ in runs]
+    best_total, best_modules = min(runs, key=lambda run: run[0])
+    forbidden = [name for name in FORBIDDEN_MODULES if name in best_modules]
+    top = sorted(best_modules.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    passed = best_total <= args.budget_ms and not forbidden
+
+    if args.json:
+        print(json.dumps({
+            "best_ms": round(best_total, 1),
+            "median_ms": round(statistics.median(totals), 1),
+            "budget_ms": args.budget_ms,
+            "forbidden_imported": forbidden,
+            "top_modules": [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in top],
+            "passed": passed,
+        }, ensure_ascii=False, indent=2))
+    else:
+        print(f"Импорт main: лучший {best_total:.1f} мс, медиана {statistics.median(totals):.1f} мс "
+              f"(бюджет {args.budget_ms:.0f} мс, запусков {args.repeat})")
+        print("Самые дорогие модули (накопленное время):")
+        for name, ms in top:
+            print(f"  {ms:8.1f} мс  {name}")
+        if forbidden:
+            print(f"При запуске импортируются модули, которые должны загружаться лениво: {', '.join(forbidden)}")
+        if best_total > args.budget_ms:
+            print("Бюджет времени импорта превышен.")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
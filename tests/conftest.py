@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+Общие настройки тестов. Модули приложения импортируются так же, как при запуске
+из папки work_timer_flet (без пакета), поэтому она добавляется в sys.path.
+"""
+
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "work_timer_flet")
+sys.path.insert(0, APP_DIR)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Настоящая страница Flet без клиента: сессия поверх соединения, которое только
+запоминает отправленные сообщения. События приходят в элементы так же, как от
+клиента, - через Session.dispatch_event по id элемента, поэтому обработчик,
+назначенный несуществующему событию (например, on_change у ft.Dropdown), не вызывается.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import flet as ft
+from flet.messaging.connection import Connection
+from flet.messaging.session import Session
+from flet.pubsub.pubsub_hub import PubSubHub
+
+from async_database import AsyncDatabaseManager
+from database_manager import DatabaseManager
+
+
+class RecordingConnection(Connection):
+    """Соединение без клиента: сообщения для клиента сохраняются в messages."""
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+
+@asynccontextmanager
+async def open_page(db_path):
+    """Страница с page.db_manager и page.appbar, как их настраивает main.py."""
+    connection = RecordingConnection()
+    connection.loop = asyncio.get_running_loop()
+    connection.pubsubhub = PubSubHub(loop=connection.loop)
+    session = Session(connection)
+    page = session.page
+    page.db_manager = AsyncDatabaseManager(lambda: DatabaseManager(db_name=db_path))
+    page.appbar = ft.AppBar(title=ft.Text(""))
+    try:
+        yield page
+    finally:
+        page.db_manager.close()
+
+
+async def select(page, control, value):
+    """Выбор значения в списке: клиент сначала передает value, затем событие select."""
+    control.value = value
+    await page.session.dispatch_event(control._i, "select", value)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Локальный HTTP-сервер, подменяющий GitHub в тестах загрузки и проверки обновлений."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """
+    HTTP-сервер на свободном порту 127.0.0.1. Ответ на GET задает функция
+    respond(headers) -> (status, headers, body); заголовки запросов сохраняются в requests.
+    Используется как контекстный менеджер.
+    """
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(dict(self.headers))
+                status, headers, body = stub.respond(self.headers)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def file_responder(data, ranges=True):
+    """Отдает data целиком или, если ranges, по заголовку Range (206 или 416)."""
+    def respond(headers):
+        range_header = headers.get("Range")
+        if ranges and range_header:
+            start = int(range_header[len("bytes="):].rstrip("-"))
+            if start >= len(data):
+                return 416, {"Content-Range": f"bytes */{len(data)}"}, b""
+            return 206, {"Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"}, data[start:]
+        return 200, {}, data
+    return respond
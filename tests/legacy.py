@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Построение баз данных в том виде, в каком их оставляли прошлые версии приложения
+(до появления PRAGMA user_version), для проверки миграций и чтения старых баз.
+"""
+
+import sqlite3
+
+
+def create_v0_database(path, entries, monthly_settings=(), lunch_duration_hours=None, duration_minutes=False):
+    """
+    Создает базу исходной версии: время записей - TEXT, без work_date и индексов, user_version = 0.
+
+    :param entries: кортежи (start_time, end_time, comment) со строками "ГГГГ-ММ-ДД ЧЧ:ММ:СС".
+    :param monthly_settings: кортежи (year, month, hourly_rate, advance).
+    :param lunch_duration_hours: значение глобальной настройки обеда (None - не задана).
+    :param duration_minutes: добавить столбец duration_minutes самой первой схемы.
+    """
+    conn = sqlite3.connect(path)
+    extra_column = "duration_minutes INTEGER," if duration_minutes else ""
+    conn.execute(f"""
+        CREATE TABLE work_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            {extra_column}
+            comment TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE monthly_settings (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            hourly_rate REAL DEFAULT 0.0,
+            advance REAL DEFAULT 0.0,
+            PRIMARY KEY (year, month)
+        )
+    """)
+    conn.execute("CREATE TABLE global_settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO work_entries (start_time, end_time, comment) VALUES (?, ?, ?)", entries)
+    conn.executemany("INSERT INTO monthly_settings VALUES (?, ?, ?, ?)", monthly_settings)
+    if lunch_duration_hours is not None:
+        conn.execute("INSERT INTO global_settings VALUES ('lunch_duration_hours', ?)", (str(lunch_duration_hours),))
+    conn.commit()
+    conn.close()
+
+
+def create_v2_database(path, entries, monthly_settings=(), lunch_duration_hours=None):
+    """
+    Создает базу схемы v2 из версий до PRAGMA user_version: время - целые секунды "по часам",
+    столбцы duration и work_date, индексы по дню и времени начала, таблица monthly_summary
+    с ключом (year, month); user_version = 0.
+
+    Параметры - как у create_v0_database.
+    """
+    create_v0_database(path, [], monthly_settings, lunch_duration_hours)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE work_entries")
+    conn.execute("""
+        CREATE TABLE work_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            comment TEXT,
+            work_date TEXT
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX idx_work_entries_work_date ON work_entries(work_date)")
+    conn.execute("CREATE INDEX idx_work_entries_start_time ON work_entries(start_time)")
+    conn.execute("""
+        CREATE TABLE monthly_summary (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            work_days_count INTEGER NOT NULL DEFAULT 0,
+            total_minutes_with_lunch REAL NOT NULL DEFAULT 0.0,
+            total_minutes_without_lunch REAL NOT NULL DEFAULT 0.0,
+            hourly_rate REAL DEFAULT 0.0,
+            advance REAL DEFAULT 0.0,
+            PRIMARY KEY (year, month)
+        )
+    """)
+    # Одна запись на день: более поздняя заменяет раннюю, как в add_or_update_entry тех версий
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO work_entries (start_time, end_time, duration, comment, work_date)
+        SELECT s, e, e - s, ?, date(?)
+        FROM (SELECT CAST(strftime('%s', ?) AS INTEGER) AS s, CAST(strftime('%s', ?) AS INTEGER) AS e)
+        """,
+        [(comment, start, start, end) for start, end, comment in entries]
+    )
+    conn.commit()
+    conn.close()
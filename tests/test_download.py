@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Загрузка APK: докачка по HTTP Range, уже скачанный целиком частичный файл (416),
+сервер без поддержки Range и несовпадение контрольной суммы.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from http_stub import StubServer, file_responder
+from updater import download_file
+
+DATA = bytes(range(256)) * 1000
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def _write_part(path, data):
+    with open(path + ".part", "wb") as file:
+        file.write(data)
+
+
+def _read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_resumes_with_range(tmp_path):
+    path = str(tmp_path / "update.apk")
+    _write_part(path, DATA[:100000])
+    progress = []
+    with StubServer(file_responder(DATA)) as server:
+        assert download_file(server.url, path, SHA256, lambda done, total: progress.append((done, total)),
+                             chunk_size=4096) == path
+    assert server.requests[0]["Range"] == "bytes=100000-"
+    assert _read(path) == DATA
+    assert not os.path.exists(path + ".part")
+    # Прогресс продолжается с уже скачанной части и знает полный размер
+    assert progress[0][0] > 100000
+    assert progress[-1] == (len(DATA), len(DATA))
+
+
+def test_complete_part_file_gets_416(tmp_path):
+    path = str(tmp_path / "update.apk")
+    _write_part(path, DATA)
+    with StubServer(file_responder(DATA)) as server:
+        assert download_file(server.url, path, SHA256) == path
+    assert len(server.requests) == 1
+    assert _read(path) == DATA
+
+
+def test_server_without_range_support(tmp_path):
+    path = str(tmp_path / "update.apk")
+    _write_part(path, DATA[:100000])
+    with StubServer(file_responder(DATA, ranges=False)) as server:
+        assert download_file(server.url, path, SHA256) == path
+    # Сервер прислал файл целиком: частичный файл перезаписан, а не дополнен
+    assert _read(path) == DATA
+
+
+def test_bad_checksum(tmp_path):
+    path = str(tmp_path / "update.apk")
+    with StubServer(file_responder(DATA)) as server:
+        with pytest.raises(ValueError):
+            download_file(server.url, path, "0" * 64)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".part")
+
+
+def test_stale_part_file_is_downloaded_again(tmp_path):
+    path = str(tmp_path / "update.apk")
+    _write_part(path, b"x" * 100000) # Остаток загрузки другой версии
+    with StubServer(file_responder(DATA)) as server:
+        assert download_file(server.url, path, SHA256) == path
+    assert [request.get("Range") for request in server.requests] == ["bytes=100000-", None]
+    assert _read(path) == DATA
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Записи, настройки, импорт и экспорт для несуществующего сотрудника отклоняются:
+такие строки не видны ни в списках сотрудников, ни в расчете зарплаты.
+"""
+
+import pytest
+
+import manage
+from database_manager import DatabaseManager
+
+UNKNOWN_EMPLOYEE_ID = 42
+
+
+def _row_counts(db_manager):
+    return [
+        db_manager.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("work_entries", "monthly_summary", "monthly_settings")
+    ]
+
+
+def test_unknown_employee_is_rejected(tmp_path):
+    db_manager = DatabaseManager(db_name=str(tmp_path / "employees.db"))
+    with pytest.raises(ValueError):
+        db_manager.add_or_update_entry("2024-01-05 09:00:00", "2024-01-05 18:00:00", employee_id=UNKNOWN_EMPLOYEE_ID)
+    with pytest.raises(ValueError):
+        db_manager.import_entries(
+            [("2024-01-05 09:00:00", "2024-01-05 18:00:00", "")], employee_id=UNKNOWN_EMPLOYEE_ID
+        )
+    with pytest.raises(ValueError):
+        db_manager.save_settings_for_month(2024, 1, 300, 0, employee_id=UNKNOWN_EMPLOYEE_ID)
+    with pytest.raises(ValueError):
+        db_manager.set_lunch_duration_hours(0.5, employee_id=UNKNOWN_EMPLOYEE_ID)
+    assert _row_counts(db_manager) == [0, 0, 0]
+    assert db_manager.get_settings_for_month(2024, 1, employee_id=UNKNOWN_EMPLOYEE_ID)['hourly_rate'] == 0.0
+
+    # Добавленный сотрудник принимается
+    employee_id = db_manager.add_employee("Иванов")
+    db_manager.add_or_update_entry("2024-01-05 09:00:00", "2024-01-05 18:00:00", employee_id=employee_id)
+    assert _row_counts(db_manager) == [1, 1, 0]
+    db_manager.close()
+
+
+def test_manage_reports_unknown_employee(tmp_path, capsys):
+    db_path = str(tmp_path / "manage.db")
+    csv_path = tmp_path / "entries.csv"
+    csv_path.write_text("start_time,end_time\n2024-01-05 09:00:00,2024-01-05 18:00:00\n", encoding="utf-8")
+    export_path = tmp_path / "export.csv"
+
+    assert manage.main(["import", db_path, str(csv_path), "--employee", str(UNKNOWN_EMPLOYEE_ID)]) == 1
+    assert manage.main(["export", db_path, str(export_path), "--employee", str(UNKNOWN_EMPLOYEE_ID)]) == 1
+    assert capsys.readouterr().out.count(f"Сотрудник с id {UNKNOWN_EMPLOYEE_ID} не найден") == 2
+    assert not export_path.exists()
+
+    db_manager = DatabaseManager(db_name=db_path)
+    assert _row_counts(db_manager) == [0, 0, 0]
+    db_manager.close()
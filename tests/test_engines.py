@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Способы расчета сводки ("table", "sql", "python" и пакетный calculate_summaries)
+должны давать одинаковый результат, в том числе на границах порогов вычета обеда.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from calculator import calculate_monthly_summary, calculate_summaries
+from database_manager import DatabaseManager
+
+# Пороги вычета обеда - 3 и 8 часов; длительности в секундах вокруг них
+EDGE_DURATIONS = [
+    minutes * 60 + delta
+    for minutes in (180, 480)
+    for delta in (-60, -1, 0, 1, 60)
+]
+MONTHS = [(2023, month) for month in range(1, 13)] + [(2024, month) for month in range(1, 13)]
+
+
+def _fill_database(db_manager, rng):
+    """Записи на случайные дни 2023-2024 годов: сначала граничные длительности, затем случайные."""
+    days = rng.sample(range((date(2024, 12, 31) - date(2023, 1, 1)).days + 1), 300)
+    durations = EDGE_DURATIONS + [rng.randint(1, 14 * 3600) for _ in range(len(days) - len(EDGE_DURATIONS))]
+    for offset, duration in zip(days, durations):
+        day = date(2023, 1, 1) + timedelta(days=offset)
+        start = datetime(day.year, day.month, day.day, rng.randint(5, 9), rng.randint(0, 59))
+        db_manager.add_or_update_entry(start, start + timedelta(seconds=duration))
+    for year, month in rng.sample(MONTHS, 6):
+        db_manager.save_settings_for_month(year, month, rng.choice([250.5, 300, 333.3]), rng.choice([0, 7000]))
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("lunch_duration_hours", [0.5, 1.0, 1.25])
+def test_engines_agree(tmp_path, seed, lunch_duration_hours):
+    db_manager = DatabaseManager(db_name=str(tmp_path / "engines.db"))
+    db_manager.set_lunch_duration_hours(lunch_duration_hours)
+    _fill_database(db_manager, random.Random(seed))
+
+    batch = calculate_summaries(db_manager, MONTHS[0], MONTHS[-1])
+    for year, month in MONTHS:
+        expected = calculate_monthly_summary(db_manager, year, month, engine="python")
+        for summary in (
+            calculate_monthly_summary(db_manager, year, month, engine="sql"),
+            calculate_monthly_summary(db_manager, year, month, engine="table"),
+            batch[(year, month)],
+        ):
+            assert summary['work_days_count'] == expected['work_days_count']
+            for key, value in expected.items():
+                # Денежные суммы округлены до копеек, поэтому допускаем расхождение в округлении
+                assert summary[key] == pytest.approx(value, rel=1e-9, abs=0.011), (year, month, key)
+    db_manager.close()
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Глобальный ключ продолжительности обеда остался в старом коде и сценариях:
+он должен менять обед основного сотрудника, а не писать мертвую настройку.
+"""
+
+from calculator import calculate_monthly_summary
+from database_manager import DatabaseManager
+
+
+def test_lunch_key_updates_default_employee(tmp_path):
+    db_manager = DatabaseManager(db_name=str(tmp_path / "settings.db"))
+    db_manager.add_or_update_entry("2024-01-10 09:00:00", "2024-01-10 18:00:00")
+    db_manager.set_global_setting("lunch_duration_hours", 0.5)
+    assert db_manager.get_lunch_duration_hours() == 0.5
+    assert db_manager.get_global_setting("lunch_duration_hours") is None
+    assert calculate_monthly_summary(db_manager, 2024, 1)['total_hours_without_lunch'] == 8.5
+
+    db_manager.set_global_settings({"lunch_duration_hours": "1.25", "theme": "dark"})
+    assert db_manager.get_lunch_duration_hours() == 1.25
+    assert db_manager.get_global_setting("theme") == "dark"
+    assert calculate_monthly_summary(db_manager, 2024, 1)['total_hours_without_lunch'] == 7.75
+    db_manager.close()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Экран истории: события выпадающих списков доходят до обработчиков, быстрая
+смена месяца строит отчет только для последнего выбора, а страница, прочитанная
+для уже закрытого периода, не попадает в список нового.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from calculator import build_history_page
+from flet_page import open_page, select
+from views.history_view import RANGE_PAGE_SIZE, HistoryView
+
+
+def test_rapid_month_changes_are_coalesced(tmp_path):
+    async def scenario():
+        async with open_page(str(tmp_path / "history.db")) as page:
+            await page.db_manager.add_or_update_entry("2024-03-04 09:00:00", "2024-03-04 18:00:00")
+            view = HistoryView(None)
+            page.add(view)
+            view.year_dropdown.value = "2024"
+
+            loaded = []
+            load_history = view.load_history
+
+            async def counting_load_history(generation=None):
+                loaded.append((view.month_dropdown.value, generation))
+                await load_history(generation)
+
+            view.load_history = counting_load_history
+            # Каждое событие клиента Flet обрабатывается в своей задаче, поэтому они перекрываются
+            await asyncio.gather(*(select(page, view.month_dropdown, month) for month in ("1", "2", "3")))
+
+            assert loaded == [("3", 3)]
+            assert view.load_generation == 3
+            assert page.appbar.title.value == "История за 03.2024"
+            assert len(view.entries_table.rows) == 1
+
+    asyncio.run(scenario())
+
+
+def test_year_change_reaches_handler(tmp_path):
+    async def scenario():
+        async with open_page(str(tmp_path / "history.db")) as page:
+            view = HistoryView(None)
+            page.add(view)
+            view.month_dropdown.value = "5"
+            await select(page, view.year_dropdown, "2024")
+            assert view.load_generation == 1
+            assert page.appbar.title.value == "История за 05.2024"
+
+    asyncio.run(scenario())
+
+
+def test_period_change_disables_unused_parts(tmp_path):
+    async def scenario():
+        async with open_page(str(tmp_path / "history.db")) as page:
+            view = HistoryView(None)
+            page.add(view)
+            await select(page, view.period_dropdown, "year")
+            assert view.month_dropdown.disabled and not view.year_dropdown.disabled
+            await select(page, view.period_dropdown, "all")
+            assert view.month_dropdown.disabled and view.year_dropdown.disabled
+            await select(page, view.period_dropdown, "month")
+            assert not view.month_dropdown.disabled and not view.year_dropdown.disabled
+
+    asyncio.run(scenario())
+
+
+def test_stale_range_page_is_dropped(tmp_path):
+    async def scenario():
+        async with open_page(str(tmp_path / "history.db")) as page:
+            start = datetime(2023, 1, 1, 9)
+            await page.db_manager.import_entries(
+                (start + timedelta(days=offset), start + timedelta(days=offset, hours=9), "")
+                for offset in range(365 + 10) # Весь 2023 год и 10 дней 2024
+            )
+            view = HistoryView(None)
+            page.add(view)
+            await select(page, view.period_dropdown, "year")
+            view.year_dropdown.value = "2023"
+            await view.show_report()
+            assert len(view.range_list.controls) == RANGE_PAGE_SIZE
+
+            # Следующая страница 2023 года читается дольше, чем открывается 2024 год
+            gate = asyncio.Event()
+            read = page.db_manager.read
+
+            async def slow_read(func, *args, **kwargs):
+                if func is build_history_page and args[2] is not None:
+                    await gate.wait()
+                return await read(func, *args, **kwargs)
+
+            page.db_manager.read = slow_read
+            stale_page = asyncio.create_task(view.load_range_page(view.load_generation))
+            await asyncio.sleep(0)
+            view.year_dropdown.value = "2024"
+            await view.show_report()
+            gate.set()
+            await stale_page
+
+            dates = [row.content.controls[0].value for row in view.range_list.controls]
+            assert len(dates) == 10 and all(value.endswith(".2024") for value in dates)
+            assert view.range_after is None
+            assert view.range_loading is None
+
+    asyncio.run(scenario())
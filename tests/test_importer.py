@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Импорт записей: корректные строки сохраняются, некорректные отклоняются с номером записи."""
+
+import json
+
+import pytest
+
+from calculator import calculate_monthly_summary
+from database_manager import DatabaseManager
+from importer import import_file, parse_record
+
+
+@pytest.mark.parametrize("record", [
+    {"date": "2024-01-05"},
+    {"date": "2024-01-05", "start": "09:00"},
+    {"date": "2024-01-05", "end": "18:00"},
+    {"date": "2024-01-05", "start": "", "end": "18:00"},
+    {"start_time": "2024-01-05 09:00:00"},
+    {"start_time": "2024-01-05 18:00:00", "end_time": "2024-01-05 09:00:00"},
+    {"start_time": "05.01.2024 09:00", "end_time": "05.01.2024 18:00"},
+    ["2024-01-05 09:00:00", "2024-01-05 18:00:00"],
+])
+def test_parse_record_rejects(record):
+    with pytest.raises(ValueError):
+        parse_record(record)
+
+
+def test_parse_record_forms():
+    assert parse_record({"date": "2024-01-05", "start": "09:00", "end": "18:30", "comment": "c"}) == \
+        ("2024-01-05 09:00:00", "2024-01-05 18:30:00", "c")
+    assert parse_record('{"start_time": "2024-01-05T09:00:00", "end_time": "2024-01-05 18:00"}') == \
+        ("2024-01-05 09:00:00", "2024-01-05 18:00:00", "")
+
+
+def test_import_skips_date_only_rows(tmp_path):
+    path = tmp_path / "entries.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in [
+        {"date": "2024-01-05"},
+        {"date": "2024-01-08", "start": "09:00", "end": "18:00"},
+        "не объект",
+    ]), encoding="utf-8")
+    db_manager = DatabaseManager(db_name=str(tmp_path / "import.db"))
+    result = import_file(db_manager, str(path))
+    assert (result['inserted'], result['updated'], result['rejected']) == (1, 0, 2)
+    assert [number for number, _ in result['errors']] == [1, 3]
+    assert calculate_monthly_summary(db_manager, 2024, 1)['work_days_count'] == 1
+    db_manager.close()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Обновление схемы с любой прошлой версии: база доходит до latest_version(),
+итоги по месяцам не меняются, а повторное открытие не применяет миграций.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import migrations
+from calculator import calculate_monthly_summary
+from database_manager import DatabaseManager
+from legacy import create_v0_database, create_v2_database
+from migrations import apply_migrations, latest_version
+
+MONTHS = [(2024, month) for month in range(1, 5)]
+SETTINGS = [(2024, 1, 300.0, 5000.0), (2024, 3, 350.0, 0.0)]
+LUNCH_HOURS = 0.5
+
+
+def _entries():
+    """Записи с разной продолжительностью и повтором одного дня (остается последняя)."""
+    start = datetime(2024, 1, 2, 9)
+    entries = []
+    for offset in range(100):
+        day_start = start + timedelta(days=offset)
+        day_end = day_start + timedelta(minutes=120 + (offset * 37) % 600)
+        entries.append((day_start.strftime("%Y-%m-%d %H:%M:%S"), day_end.strftime("%Y-%m-%d %H:%M:%S"), f"д{offset}"))
+    entries.append(("2024-01-05 10:00:00", "2024-01-05 19:30:00", "исправление"))
+    return entries
+
+
+@pytest.fixture
+def expected(tmp_path):
+    """Итоги тех же данных, записанных в новую базу через текущий API."""
+    db_manager = DatabaseManager(db_name=str(tmp_path / "reference.db"))
+    db_manager.set_lunch_duration_hours(LUNCH_HOURS)
+    for start, end, comment in _entries():
+        db_manager.add_or_update_entry(start, end, comment)
+    for year, month, hourly_rate, advance in SETTINGS:
+        db_manager.save_settings_for_month(year, month, hourly_rate, advance)
+    summaries = {month: calculate_monthly_summary(db_manager, *month, engine="python") for month in MONTHS}
+    db_manager.close()
+    return summaries
+
+
+def _check_upgraded(path, expected):
+    db_manager = DatabaseManager(db_name=path)
+    assert db_manager.conn.execute("PRAGMA user_version").fetchone()[0] == latest_version()
+    assert db_manager.get_lunch_duration_hours() == LUNCH_HOURS
+    for month in MONTHS:
+        assert calculate_monthly_summary(db_manager, *month) == expected[month]
+        assert calculate_monthly_summary(db_manager, *month, engine="python") == expected[month]
+    assert db_manager.rebuild_monthly_summary() == []
+    db_manager.close()
+
+    # Повторное открытие: актуальная база не меняется
+    db_manager = DatabaseManager(db_name=path)
+    assert apply_migrations(db_manager) == []
+    db_manager.close()
+
+
+@pytest.mark.parametrize("duration_minutes", [False, True])
+def test_upgrade_from_version_0(tmp_path, expected, duration_minutes):
+    path = str(tmp_path / "v0.db")
+    create_v0_database(path, _entries(), SETTINGS, LUNCH_HOURS, duration_minutes=duration_minutes)
+    _check_upgraded(path, expected)
+
+
+def test_upgrade_from_unversioned_v2(tmp_path, expected):
+    path = str(tmp_path / "v2.db")
+    create_v2_database(path, _entries(), SETTINGS, LUNCH_HOURS)
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == 0
+    _check_upgraded(path, expected)
+
+
+@pytest.mark.parametrize("version", range(1, latest_version()))
+def test_upgrade_from_intermediate_version(tmp_path, expected, monkeypatch, version):
+    path = str(tmp_path / f"v{version}.db")
+    create_v0_database(path, _entries(), SETTINGS, LUNCH_HOURS)
+    # Доводим базу только до version, как это сделало бы приложение того времени
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:version])
+        DatabaseManager(db_name=path).close()
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == version
+    _check_upgraded(path, expected)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Пакетный расчет зарплаты: отчет по нескольким базам без изменения исходных файлов."""
+
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+
+from calculator import calculate_monthly_summary
+from database_manager import DatabaseManager
+from legacy import create_v0_database
+from payroll import run_payroll
+
+MONTHS = ((2024, 1), (2024, 3))
+
+
+def _digest(path):
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _entries(days):
+    start = datetime(2024, 1, 1, 9)
+    for offset in range(days):
+        day_start = start + timedelta(days=offset)
+        yield (
+            day_start.strftime("%Y-%m-%d %H:%M:%S"),
+            (day_start + timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S"),
+            "",
+        )
+
+
+def test_current_database_is_read_without_changes(tmp_path):
+    path = str(tmp_path / "current.db")
+    db_manager = DatabaseManager(db_name=path)
+    db_manager.import_entries(_entries(80))
+    db_manager.save_settings_for_month(2024, 1, 300, 1000)
+    expected = [calculate_monthly_summary(db_manager, 2024, month) for month in (1, 2, 3)]
+    db_manager.close()
+    digest = _digest(path)
+
+    report = run_payroll([path], *MONTHS, workers=1)
+    assert report['errors'] == []
+    assert [row['final_payout'] for row in report['rows']] == [summary['final_payout'] for summary in expected]
+    assert _digest(path) == digest
+
+
+def test_old_database_is_migrated_in_a_copy(tmp_path):
+    path = str(tmp_path / "old.db")
+    create_v0_database(path, list(_entries(80)), monthly_settings=[(2024, 1, 300, 0)], lunch_duration_hours=0.5)
+    digest = _digest(path)
+
+    report = run_payroll([path], *MONTHS, workers=1)
+    assert report['errors'] == []
+    assert [row['work_days_count'] for row in report['rows']] == [31, 29, 20]
+    assert report['rows'][0]['total_hours_without_lunch'] == 31 * 8.5
+    assert _digest(path) == digest
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
+
+def test_newer_schema_and_missing_file_are_reported(tmp_path):
+    newer = str(tmp_path / "newer.db")
+    conn = sqlite3.connect(newer)
+    conn.execute("PRAGMA user_version = 999")
+    conn.close()
+    report = run_payroll([newer, str(tmp_path / "missing.db")], *MONTHS, workers=1)
+    assert report['rows'] == []
+    assert len(report['errors']) == 2
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Выборки за месяц должны идти по индексу (employee_id, start_time), а не полным
+просмотром таблицы. Проверяются планы запросов, которые методы выполняют на самом деле.
+"""
+
+from datetime import date, datetime, timedelta
+
+from database_manager import DatabaseManager
+
+
+def _query_plans(db_manager, call):
+    """Выполняет call() и возвращает планы выполненных им запросов SELECT к work_entries."""
+    statements = []
+    db_manager.conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        db_manager.conn.set_trace_callback(None)
+    plans = []
+    for statement in statements:
+        if statement.lstrip().upper().startswith("SELECT") and "work_entries" in statement:
+            rows = db_manager.conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+            plans.append(" | ".join(row[-1] for row in rows))
+    return plans
+
+
+def _assert_uses_index(plans):
+    assert plans, "метод не выполнил ни одного запроса к work_entries"
+    for plan in plans:
+        assert "SCAN work_entries" not in plan, plan
+        assert "INDEX idx_work_entries_employee_start" in plan, plan
+
+
+def test_month_queries_use_employee_start_index(tmp_path):
+    db_manager = DatabaseManager(db_name=str(tmp_path / "plan.db"))
+    start = datetime(2024, 1, 1, 9)
+    db_manager.import_entries(
+        (start + timedelta(days=offset), start + timedelta(days=offset, hours=9), "") for offset in range(400)
+    )
+
+    _assert_uses_index(_query_plans(
+        db_manager, lambda: db_manager.get_entries_between(date(2024, 3, 1), date(2024, 4, 1))
+    ))
+    db_manager.cache.clear()
+    _assert_uses_index(_query_plans(db_manager, lambda: db_manager.get_entries_for_month(2024, 3)))
+    db_manager.close()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Проверка обновлений: пропуск в пределах интервала, условный запрос с ответом 304,
+учет неудачных попыток и растущая задержка после них.
+"""
+
+import json
+
+from http_stub import StubServer
+from updater import (
+    FAILURE_BACKOFF_SECONDS, MAX_FAILURE_BACKOFF_SECONDS, UPDATE_CHECK_INTERVAL_HOURS, check_version_info,
+)
+
+NOW = 1_700_000_000.0
+PAYLOAD = {"version": "1.0.5", "apk_url": "https://example.com/app.apk"}
+ETAG = '"v105"'
+LAST_MODIFIED = "Tue, 14 Nov 2023 22:13:20 GMT"
+
+
+def _state(last_check, failures=0):
+    """Сохраненное состояние после успешной загрузки PAYLOAD (как строки из global_settings)."""
+    return {
+        "update_etag": ETAG,
+        "update_last_modified": LAST_MODIFIED,
+        "update_last_check": str(last_check),
+        "update_payload": json.dumps(PAYLOAD),
+        "update_failures": str(failures),
+        "update_check_interval_hours": None,
+    }
+
+
+def _json_responder(headers):
+    if headers.get("If-None-Match") == ETAG:
+        return 304, {"ETag": ETAG}, b""
+    return 200, {"ETag": ETAG, "Last-Modified": LAST_MODIFIED}, json.dumps(PAYLOAD).encode("utf-8")
+
+
+def test_first_check_stores_validators():
+    with StubServer(_json_responder) as server:
+        payload, new_state = check_version_info({}, server.url, NOW)
+    assert payload == PAYLOAD
+    assert new_state["update_etag"] == ETAG
+    assert new_state["update_last_modified"] == LAST_MODIFIED
+    assert json.loads(new_state["update_payload"]) == PAYLOAD
+    assert new_state["update_failures"] == 0
+
+
+def test_skips_network_within_interval():
+    with StubServer(_json_responder) as server:
+        last_check = NOW - UPDATE_CHECK_INTERVAL_HOURS * 3600 + 60
+        assert check_version_info(_state(last_check), server.url, NOW) == (PAYLOAD, {})
+    assert server.requests == []
+
+
+def test_conditional_request_gets_304():
+    with StubServer(_json_responder) as server:
+        payload, new_state = check_version_info(_state(NOW - UPDATE_CHECK_INTERVAL_HOURS * 3600), server.url, NOW)
+    assert payload == PAYLOAD
+    assert new_state == {"update_last_check": NOW, "update_failures": 0}
+    assert server.requests[0]["If-None-Match"] == ETAG
+    assert server.requests[0]["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_server_error_increments_failures():
+    with StubServer(lambda headers: (500, {}, b"error")) as server:
+        payload, new_state = check_version_info(_state(0, failures=2), server.url, NOW)
+    assert payload == PAYLOAD # Сохраненный ответ остается в силе
+    assert new_state == {"update_last_check": NOW, "update_failures": 3}
+
+
+def test_backoff_grows_with_failures():
+    with StubServer(lambda headers: (500, {}, b"error")) as server:
+        for failures in (1, 2, 3, 20):
+            delay = min(FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1), MAX_FAILURE_BACKOFF_SECONDS)
+            state = _state(NOW, failures)
+            assert check_version_info(state, server.url, NOW + delay - 1) == (PAYLOAD, {})
+            assert server.requests == []
+            _, new_state = check_version_info(state, server.url, NOW + delay)
+            assert new_state["update_failures"] == failures + 1
+            assert len(server.requests) == 1
+            server.requests.clear()
+    # Задержка удваивается, но не превышает суток
+    assert FAILURE_BACKOFF_SECONDS * 2 ** 19 > MAX_FAILURE_BACKOFF_SECONDS
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Нагрузочная проверка режима WAL: несколько потоков читают отчеты, пока
+другой поток пишет записи и настройки. После завершения предрасчитанные
+итоги, кэш и хронология ставок должны совпадать с пересчетом с нуля.
+"""
+
+import random
+import threading
+from datetime import date, datetime, timedelta
+
+from calculator import build_month_report, calculate_monthly_summary
+from database_manager import DatabaseManager
+
+MONTHS = [(2024, month) for month in range(1, 13)]
+READERS = 4
+WRITES = 300
+
+
+def _random_day(rng):
+    return date(2024, 1, 1) + timedelta(days=rng.randrange(366))
+
+
+def test_concurrent_readers_and_writer(tmp_path):
+    db_manager = DatabaseManager(db_name=str(tmp_path / "stress.db"), wal=True, read_pool_size=READERS)
+    rng = random.Random(0)
+    for _ in range(200):
+        day = _random_day(rng)
+        start = datetime(day.year, day.month, day.day, 9)
+        db_manager.add_or_update_entry(start, start + timedelta(minutes=rng.randint(60, 660)))
+
+    done = threading.Event()
+    errors = []
+
+    def reader(seed):
+        reader_rng = random.Random(seed)
+        try:
+            while not done.is_set():
+                year, month = reader_rng.choice(MONTHS)
+                calculate_monthly_summary(db_manager, year, month)
+                build_month_report(db_manager, year, month)
+                db_manager.get_settings_for_month(year, month)
+        except Exception as e:
+            errors.append(e)
+
+    def writer():
+        try:
+            for _ in range(WRITES):
+                action = rng.random()
+                day = _random_day(rng)
+                if action < 0.6:
+                    start = datetime(day.year, day.month, day.day, rng.randint(6, 10))
+                    db_manager.add_or_update_entry(start, start + timedelta(minutes=rng.randint(60, 660)), "stress")
+                elif action < 0.8:
+                    db_manager.delete_entry_by_date(day)
+                else:
+                    db_manager.save_settings_for_month(
+                        day.year, day.month, rng.choice([250, 300, 350]), rng.choice([0, 5000])
+                    )
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(READERS)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    # Хронология в памяти совпадает с настройками, прочитанными заново
+    fresh = DatabaseManager(db_name=str(tmp_path / "stress.db"))
+    for year, month in MONTHS:
+        assert db_manager.get_settings_for_month(year, month) == fresh.get_settings_for_month(year, month)
+    fresh.close()
+
+    # Кэшированные сводки совпадают с построчным пересчетом
+    for year, month in MONTHS:
+        cached = calculate_monthly_summary(db_manager, year, month)
+        assert cached == calculate_monthly_summary(db_manager, year, month, engine="python")
+    db_manager.cache.clear()
+    for year, month in MONTHS:
+        assert calculate_monthly_summary(db_manager, year, month) == \
+            calculate_monthly_summary(db_manager, year, month, engine="python")
+
+    assert db_manager.rebuild_monthly_summary() == []
+    db_manager.close()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import queue
+import threading
+
+
+class AsyncDatabaseManager:
+    """
+    Асинхронный фасад над DatabaseManager для обработчиков Flet.
+
+    Вся работа с базой выполняется в отдельном рабочем потоке, который один
+    владеет соединением SQLite. Запросы попадают в поток через очередь
+    и выполняются строго по одному, поэтому записи не пересекаются,
+    а цикл событий интерфейса не блокируется медленным хранилищем.
+
+    Любой метод DatabaseManager можно вызвать через фасад с await:
+        entry = await page.db_manager.get_entry_by_date(date)
+    Функции, принимающие менеджер первым аргументом (например, из calculator),
+    выполняются через run():
+        report = await page.db_manager.run(build_month_report, year, month)
+    """
+    _STOP = object()
+
+    def __init__(self, open_database):
+        """
+        :param open_database: функция без аргументов, создающая DatabaseManager.
+                              Вызывается в рабочем потоке, поэтому открытие базы
+                              и миграции тоже не блокируют интерфейс.
+        """
+        self.db_manager = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, args=(open_database,), name="db-worker", daemon=True)
+        self._thread.start()
+
+    def _worker(self, open_database):
+        """Цикл рабочего потока: открывает базу и выполняет задания из очереди по порядку."""
+        open_error = None
+        try:
+            self.db_manager = open_database()
+        except Exception as e:
+            print(f"Не удалось открыть базу данных: {e}")
+            open_error = e
+
+        while True:
+            job = self._queue.get()
+            if job is self._STOP:
+                break
+            func, args, kwargs, loop, future = job
+            try:
+                if open_error is not None:
+                    raise open_error
+                result = func(self.db_manager, *args, **kwargs)
+            except Exception as e:
+                loop.call_soon_threadsafe(self._set_exception, future, e)
+            else:
+                loop.call_soon_threadsafe(self._set_result, future, result)
+
+        if self.db_manager is not None:
+            self.db_manager.close()
+
+    @staticmethod
+    def _set_result(future, result):
+        if not future.cancelled():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future, exception):
+        if not future.cancelled():
+            future.set_exception(exception)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Выполняет func(db_manager, *args, **kwargs) в рабочем потоке.
+        :return: awaitable с результатом функции.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((func, args, kwargs, loop, future))
+        return future
+
+    def read(self, func, *args, **kwargs):
+        """
+        Выполняет только читающую функцию func(db_manager, *args, **kwargs).
+        Если база открыта в режиме WAL с пулом соединений для чтения, функция
+        выполняется в общем пуле потоков параллельно с записью; иначе - в рабочем
+        потоке, как run().
+        :return: awaitable с результатом функции.
+        """
+        if self.db_manager is None or self.db_manager.read_pool is None:
+            return self.run(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(None, lambda: func(self.db_manager, *args, **kwargs))
+
+    def __getattr__(self, name):
+        """Возвращает асинхронную обертку над одноименным методом DatabaseManager."""
+        def call(*args, **kwargs):
+            return self.run(lambda db_manager: getattr(db_manager, name)(*args, **kwargs))
+        call.__name__ = name
+        return call
+
+    def close(self):
+        """Дожидается выполнения поставленных заданий и закрывает соединение."""
+        self._queue.put(self._STOP)
+        self._thread.join()
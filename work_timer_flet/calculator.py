@@ -1,70 +1,88 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from rate_timeline import month_bounds
+from migrations import DEFAULT_EMPLOYEE_ID
+from timestamps import from_epoch
 
+TAX_RATE = 0.13
 
-def calculate_monthly_summary(db_manager, year, month):
+
+def lunch_rules(lunch_duration_hours):
     """
-    Рассчитывает итоговую сводку за месяц на основе записей из базы данных и настроек.
+    Возвращает правила вычета обеда: пары (порог в минутах, вычет в минутах),
+    упорядоченные по убыванию порога.
 
-    :param db_manager: Экземпляр DatabaseManager для доступа к данным.
-    :param year: Год для расчета (int).
-    :param month: Месяц для расчета (int).
-    :return: Словарь с результатами расчетов.
+    От 8 часов и более вычитается полный обед, от 3 до 8 часов - 30 минут.
     """
-    
-    # Получаем настройки для указанного месяца из БД
-    monthly_settings = db_manager.get_settings_for_month(year, month)
-    lunch_duration_hours = float(db_manager.get_global_setting("lunch_duration_hours", 1.0))
-    hourly_rate = float(monthly_settings.get('hourly_rate', 0.0))
-    advance = float(monthly_settings.get('advance', 0.0))
+    return [
+        (8 * 60, lunch_duration_hours * 60),
+        (3 * 60, 30),
+    ]
+
+
+def lunch_minutes_to_deduct(duration_minutes, lunch_duration_hours):
+    """Возвращает, сколько минут обеда нужно вычесть из смены указанной продолжительности."""
+    for threshold, deduction in lunch_rules(lunch_duration_hours):
+        if duration_minutes >= threshold:
+            return deduction
+    return 0
 
-    entries_for_month = db_manager.get_entries_for_month(year, month)
-
-    total_minutes_with_lunch = 0
-    total_minutes_without_lunch = 0
-    work_days_count = 0
-
-    # Фильтруем записи по указанному году и месяцу
-    
-    for entry in entries_for_month:
-        work_days_count += 1
-
-        # Вычисляем продолжительность "на лету"
-        start_dt = datetime.fromisoformat(entry['start_time'])
-        end_dt = datetime.fromisoformat(entry['end_time'])
-        duration_minutes = (end_dt - start_dt).total_seconds() / 60
-
-        total_minutes_with_lunch += duration_minutes
-
-        # Вычитаем обед
-        lunch_minutes_to_deduct = 0
-        if duration_minutes >= 12 * 60:
-            # Если отработано 12 часов и более, вычитаем полный обед
-            lunch_minutes_to_deduct = lunch_duration_hours * 60
-        elif duration_minutes >= 8 * 60:
-            # Если отработано от 8 до 12 часов, также вычитаем полный обед
-            lunch_minutes_to_deduct = lunch_duration_hours * 60
-        elif duration_minutes >= 3 * 60:
-            # Если отработано от 3 до 8 часов, вычитаем 30 минут
-            lunch_minutes_to_deduct = 30
-        
-        duration_without_lunch = duration_minutes - lunch_minutes_to_deduct
-        total_minutes_without_lunch += duration_without_lunch if duration_without_lunch > 0 else 0
 
+def shift_minutes(duration_seconds, lunch_duration_hours):
+    """
+    Возвращает продолжительность одной смены в минутах: (с обедом, без обеда).
+    Продолжительность без обеда не бывает отрицательной.
+    :param duration_seconds: продолжительность смены в секундах (столбец duration).
+    """
+    duration_minutes = duration_seconds / 60
+    duration_without_lunch = duration_minutes - lunch_minutes_to_deduct(duration_minutes, lunch_duration_hours)
+    return duration_minutes, duration_without_lunch if duration_without_lunch > 0 else 0
+
+
+def build_day_rows(entries, lunch_duration_hours):
+    """
+    Возвращает строки по дням: date, weekday (0 - понедельник), start, end (datetime),
+    minutes (с обедом) и net_minutes (без обеда).
+    """
+    rows = []
+    for entry in entries:
+        start_dt = from_epoch(entry['start_time'])
+        end_dt = from_epoch(entry['end_time'])
+        minutes, net_minutes = shift_minutes(entry['duration'], lunch_duration_hours)
+        rows.append({
+            'date': start_dt.date(),
+            'weekday': start_dt.weekday(),
+            'start': start_dt,
+            'end': end_dt,
+            'minutes': minutes,
+            'net_minutes': net_minutes,
+        })
+    return rows
+
+
+def _totals_from_rows(rows):
+    """Суммирует строки по дням в итоги месяца."""
+    return {
+        'work_days_count': len(rows),
+        'total_minutes_with_lunch': sum(row['minutes'] for row in rows),
+        'total_minutes_without_lunch': sum(row['net_minutes'] for row in rows),
+    }
+
+
+def _build_summary(totals, hourly_rate, advance):
+    """Переводит итоговые минуты в часы и рассчитывает зарплату."""
     # Конвертируем минуты в часы
-    total_hours_with_lunch = total_minutes_with_lunch / 60.0
-    total_hours_without_lunch = total_minutes_without_lunch / 60.0
+    total_hours_with_lunch = totals['total_minutes_with_lunch'] / 60.0
+    total_hours_without_lunch = totals['total_minutes_without_lunch'] / 60.0
 
     # Расчет зарплаты
     gross_pay = total_hours_without_lunch * hourly_rate
-    tax_amount = gross_pay * 0.13
+    tax_amount = gross_pay * TAX_RATE
     net_pay = gross_pay - tax_amount
     final_payout = net_pay - advance
 
-
     return {
-        'work_days_count': work_days_count,
+        'work_days_count': totals['work_days_count'],
         'total_hours_with_lunch': total_hours_with_lunch,
         'total_hours_without_lunch': total_hours_without_lunch,
         'gross_pay': round(gross_pay, 2),
@@ -73,3 +91,216 @@ def calculate_monthly_summary(db_manager, year, month):
         'advance': round(advance, 2),
         'final_payout': round(final_payout, 2),
     }
+
+
+def calculate_monthly_summary(db_manager, year, month, engine="table", employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Рассчитывает итоговую сводку за месяц на основе записей из базы данных и настроек.
+    Результат кэшируется в db_manager.cache до ближайшего изменения данных,
+    влияющих на этот месяц.
+
+    :param db_manager: Экземпляр DatabaseManager для доступа к данным.
+    :param year: Год для расчета (int).
+    :param month: Месяц для расчета (int).
+    :param engine: Способ агрегации: "table" - чтение предрасчитанных итогов из monthly_summary,
+                   "python" - построчно в Python,
+                   "sql" - одним агрегирующим запросом на стороне SQLite.
+    :param employee_id: Сотрудник, для которого рассчитывается сводка.
+    :return: Словарь с результатами расчетов.
+    """
+    summary = db_manager.cache.get_or_compute(
+        ("summary", year, month, engine, employee_id),
+        lambda: _calculate_monthly_summary(db_manager, year, month, engine, employee_id),
+    )
+    return dict(summary)
+
+
+def _calculate_monthly_summary(db_manager, year, month, engine, employee_id=DEFAULT_EMPLOYEE_ID):
+    """Рассчитывает сводку за месяц без использования кэша."""
+
+    if engine == "table":
+        # Итоги, ставка и аванс уже лежат в одной строке monthly_summary
+        month_summary = db_manager.get_month_summary(year, month, employee_id=employee_id)
+        return _build_summary(month_summary, float(month_summary['hourly_rate']), float(month_summary['advance']))
+
+    # Получаем настройки сотрудника для указанного месяца из БД
+    monthly_settings = db_manager.get_settings_for_month(year, month, employee_id=employee_id)
+    lunch_duration_hours = db_manager.get_lunch_duration_hours(employee_id)
+    hourly_rate = float(monthly_settings.get('hourly_rate', 0.0))
+    advance = float(monthly_settings.get('advance', 0.0))
+
+    if engine == "sql":
+        start, end = month_bounds(year, month)
+        totals = db_manager.get_totals_between(start, end, lunch_rules(lunch_duration_hours), employee_id=employee_id)
+    elif engine == "python":
+        entries_for_month = db_manager.get_entries_for_month(year, month, employee_id=employee_id)
+        totals = _totals_from_rows(build_day_rows(entries_for_month, lunch_duration_hours))
+    else:
+        raise ValueError(f"Неизвестный способ агрегации: {engine}")
+
+    return _build_summary(totals, hourly_rate, advance)
+
+
+def build_month_report(db_manager, year, month, employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Готовит отчет за месяц за один проход: строки по дням для таблицы истории
+    и итоговую сводку, посчитанную по тем же строкам.
+
+    Записи месяца читаются из базы один раз, настройки берутся из хронологии ставок.
+    Отчет кэшируется в db_manager.cache, как и сводки calculate_monthly_summary.
+
+    :return: Словарь {'rows': [...], 'summary': {...}}; формат строк - как у build_day_rows,
+             формат сводки - как у calculate_monthly_summary.
+    """
+    def compute():
+        monthly_settings = db_manager.get_settings_for_month(year, month, employee_id=employee_id)
+        lunch_duration_hours = db_manager.get_lunch_duration_hours(employee_id)
+        rows = build_day_rows(
+            db_manager.get_entries_for_month(year, month, employee_id=employee_id), lunch_duration_hours
+        )
+        summary = _build_summary(
+            _totals_from_rows(rows),
+            float(monthly_settings.get('hourly_rate', 0.0)),
+            float(monthly_settings.get('advance', 0.0)),
+        )
+        return {'rows': rows, 'summary': summary}
+
+    report = db_manager.cache.get_or_compute(("report", year, month, employee_id), compute)
+    return {'rows': list(report['rows']), 'summary': dict(report['summary'])}
+
+
+def build_history_page(db_manager, start=None, end=None, after=None, limit=100, employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Готовит одну страницу строк по дням для просмотра истории за длинный период.
+
+    :param start: начало периода включительно (None - с первой записи).
+    :param end: конец периода не включительно (None - до последней записи).
+    :param after: ключ, возвращенный для предыдущей страницы; None - первая страница.
+    :param employee_id: сотрудник, чьи записи показываются.
+    :return: Словарь {'rows': [...], 'after': ключ следующей страницы или None, если страниц больше нет};
+             формат строк - как у build_day_rows.
+    """
+    lunch_duration_hours = db_manager.get_lunch_duration_hours(employee_id)
+    entries = db_manager.get_entries_page(start, end, after, limit, employee_id=employee_id)
+    next_after = entries[-1]['start_time'] if len(entries) == limit else None
+    return {'rows': build_day_rows(entries, lunch_duration_hours), 'after': next_after}
+
+
+def calculate_range_summary(db_manager, start_month=None, end_month=None, employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Рассчитывает сводку за диапазон месяцев (или за все время) по предрасчитанным
+    итогам monthly_summary: одна строка на месяц, независимо от количества записей.
+
+    Начисления считаются по ставке каждого месяца и складываются. Авансы относятся
+    к выплатам конкретных месяцев, поэтому в сводку за период не входят.
+
+    :return: Словарь work_days_count, total_hours_with_lunch, total_hours_without_lunch,
+             gross_pay, tax_amount и net_pay.
+    """
+    result = dict.fromkeys(
+        ['work_days_count', 'total_hours_with_lunch', 'total_hours_without_lunch', 'gross_pay', 'tax_amount', 'net_pay'],
+        0,
+    )
+    for row in db_manager.get_month_summaries(start_month, end_month, employee_id=employee_id):
+        summary = _build_summary(row, float(row['hourly_rate'] or 0.0), 0.0)
+        for key in result:
+            result[key] += summary[key]
+    for key in ('gross_pay', 'tax_amount', 'net_pay'):
+        result[key] = round(result[key], 2)
+    return result
+
+
+def _month_index(year, month):
+    """Порядковый номер месяца, начиная с января 1970 года."""
+    return (year - 1970) * 12 + (month - 1)
+
+
+def _group_totals_numpy(np, times, first_index, months_count, lunch_duration_hours):
+    """Векторно считает итоги по месяцам из массива пар секунд (начало, конец)."""
+    times = np.asarray(times, dtype=np.int64).reshape(-1, 2)
+    starts = times[:, 0]
+    durations = (times[:, 1] - starts) / 60.0
+
+    rules = lunch_rules(lunch_duration_hours)
+    deductions = np.select(
+        [durations >= threshold for threshold, _ in rules],
+        [deduction for _, deduction in rules],
+        default=0,
+    )
+    without_lunch = np.maximum(durations - deductions, 0)
+
+    # Номер месяца каждой записи относительно первого месяца диапазона
+    month_offsets = starts.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64) - first_index
+    days = np.bincount(month_offsets, minlength=months_count)
+    with_lunch_totals = np.bincount(month_offsets, weights=durations, minlength=months_count)
+    without_lunch_totals = np.bincount(month_offsets, weights=without_lunch, minlength=months_count)
+
+    return [
+        {
+            'work_days_count': int(days[i]),
+            'total_minutes_with_lunch': float(with_lunch_totals[i]),
+            'total_minutes_without_lunch': float(without_lunch_totals[i]),
+        }
+        for i in range(months_count)
+    ]
+
+
+def _group_totals_python(times, first_index, months_count, lunch_duration_hours):
+    """Запасной вариант без NumPy: тот же расчет обычным циклом."""
+    totals = [
+        {'work_days_count': 0, 'total_minutes_with_lunch': 0, 'total_minutes_without_lunch': 0}
+        for _ in range(months_count)
+    ]
+    for start_seconds, end_seconds in times:
+        start_dt = from_epoch(start_seconds)
+        month_totals = totals[_month_index(start_dt.year, start_dt.month) - first_index]
+        minutes, net_minutes = shift_minutes(end_seconds - start_seconds, lunch_duration_hours)
+        month_totals['work_days_count'] += 1
+        month_totals['total_minutes_with_lunch'] += minutes
+        month_totals['total_minutes_without_lunch'] += net_minutes
+    return totals
+
+
+def calculate_summaries(db_manager, start_month, end_month, employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Рассчитывает сводки сразу за диапазон месяцев (например, за год или несколько лет).
+
+    Все записи диапазона загружаются одним запросом, вычет обеда и группировка
+    по месяцам выполняются векторно в NumPy (если он установлен), а ставка и аванс
+    берутся из хронологии настроек без дополнительных запросов.
+
+    :param db_manager: Экземпляр DatabaseManager для доступа к данным.
+    :param start_month: Первый месяц диапазона, кортеж (год, месяц).
+    :param end_month: Последний месяц диапазона включительно, кортеж (год, месяц).
+    :param employee_id: Сотрудник, для которого рассчитываются сводки.
+    :return: Словарь {(год, месяц): сводка} в хронологическом порядке,
+             сводки в том же формате, что и у calculate_monthly_summary.
+    """
+    first_index = _month_index(*start_month)
+    months_count = _month_index(*end_month) - first_index + 1
+    if months_count <= 0:
+        return {}
+
+    lunch_duration_hours = db_manager.get_lunch_duration_hours(employee_id)
+    timeline = db_manager.get_rate_timeline(employee_id)
+    start, _ = month_bounds(*start_month)
+    _, end = month_bounds(*end_month)
+    times = db_manager.get_epoch_times_between(start, end, employee_id=employee_id)
+
+    try:
+        import numpy as np # Импортируем лениво, чтобы не замедлять запуск приложения
+    except ImportError:
+        totals = _group_totals_python(times, first_index, months_count, lunch_duration_hours)
+    else:
+        totals = _group_totals_numpy(np, times, first_index, months_count, lunch_duration_hours)
+
+    summaries = {}
+    for offset, month_totals in enumerate(totals):
+        year, month = divmod(first_index + offset, 12)
+        year, month = year + 1970, month + 1
+        summaries[(year, month)] = _build_summary(
+            month_totals,
+            timeline.rate_for(year, month),
+            timeline.advance_for(year, month),
+        )
+    return summaries
@@ -1,199 +1,739 @@
 # -*- coding: utf-8 -*-
 
 import sqlite3
-from datetime import datetime
+import queue
+import threading
+from contextlib import contextmanager
 import os
 
+from rate_timeline import RateTimeline, month_bounds
+from calculator import lunch_rules, shift_minutes
+from result_cache import MonthCache
+from timestamps import to_epoch, from_epoch
+from migrations import apply_migrations, latest_version, DEFAULT_EMPLOYEE_ID
+from instrumentation import QueryStats
+
+
+def _lunch_case_sql(rules):
+    """
+    Строит SQL-выражение CASE с вычетом обеда для столбца minutes
+    (продолжительность в минутах) и параметры для него.
+    """
+    cases = " ".join("WHEN minutes >= ? THEN ?" for _ in rules)
+    params = [value for rule in rules for value in rule]
+    return f"CASE {cases} ELSE 0 END", params
+
+
+def _entry_values(start_time, end_time):
+    """
+    Переводит время записи в значения столбцов: (work_date, start_time, end_time, duration).
+    :param start_time: время начала (datetime, ISO-строка или секунды)
+    :param end_time: время окончания (datetime, ISO-строка или секунды)
+    """
+    start_seconds = to_epoch(start_time)
+    end_seconds = to_epoch(end_time)
+    work_date = from_epoch(start_seconds).date().isoformat()
+    return work_date, start_seconds, end_seconds, end_seconds - start_seconds
+
+
 class DatabaseManager:
     """
     Класс для управления всеми операциями с базой данных SQLite.
     """
-    def __init__(self, db_name):
+    def __init__(self, db_name, wal=False, read_pool_size=2, instrument=False, read_only=False):
         """
-        Инициализирует менеджер и создает таблицу, если она не существует.
+        Инициализирует менеджер и доводит схему базы до актуальной версии (см. migrations.py).
+
+        :param wal: Включить режим WAL с пулом соединений только для чтения.
+                    Тогда чтение (отчеты, экспорт) из других потоков идет
+                    параллельно с записью и не ждет ее завершения.
+        :param read_pool_size: Количество соединений для чтения в режиме WAL.
+        :param instrument: Собирать статистику вызовов методов и SQL-запросов
+                           (см. instrumentation.py и get_diagnostics).
+        :param read_only: Открыть существующую базу только для чтения (например, для отчетов).
+                          Миграции не применяются, поэтому схема должна быть актуальной.
+        :raises ValueError: если база открывается только для чтения и ее схема не последней версии.
         """
         db_dir = os.path.dirname(db_name)
-        if db_dir and not os.path.exists(db_dir):
+        if db_dir and not os.path.exists(db_dir) and not read_only:
             os.makedirs(db_dir)
 
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        # Хронологии ставок сотрудников загружаются при первом обращении к настройкам месяцев
+        self.rate_timelines = {}
+        # Кэш списков записей и сводок по месяцам, сбрасывается методами записи
+        self.cache = MonthCache()
+        # Запись всегда идет через одно соединение под этой блокировкой.
+        # Без WAL под ней же выполняется и чтение, так как соединение общее.
+        self.lock = threading.RLock()
+        self.read_pool = None
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(db_name, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row # Возвращаем строки как словари
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS work_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                comment TEXT
-            )
-        """)
-        
-        # --- Миграция: Проверяем и удаляем старый столбец duration_minutes ---
-        cursor.execute("PRAGMA table_info(work_entries)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'duration_minutes' in columns:
-            print("Обнаружена старая схема БД. Выполняется миграция...")
-            # 1. Переименовываем старую таблицу
-            cursor.execute("ALTER TABLE work_entries RENAME TO _work_entries_old")
-            # 2. Создаем новую таблицу с правильной структурой
-            cursor.execute("""
-                CREATE TABLE work_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    start_time TEXT NOT NULL,
-                    end_time TEXT NOT NULL,
-                    comment TEXT
+        self.stats = QueryStats() if instrument else None
+        if self.stats is not None:
+            self.stats.attach(self.conn)
+        if wal and not read_only:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            # В режиме WAL NORMAL не грозит повреждением базы, а fsync выполняется реже
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        if read_only:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != latest_version():
+                self.conn.close()
+                raise ValueError(
+                    f"Версия схемы базы {version}, а для чтения без миграций нужна {latest_version()}"
                 )
-            """)
-            # 3. Копируем данные из старой таблицы в новую (без duration_minutes)
-            cursor.execute("INSERT INTO work_entries (id, start_time, end_time, comment) SELECT id, start_time, end_time, comment FROM _work_entries_old")
-            # 4. Удаляем старую таблицу
-            cursor.execute("DROP TABLE _work_entries_old")
-            print("Миграция успешно завершена.")
-
-        # Создаем таблицу для настроек по месяцам
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS monthly_settings (
-                year INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                hourly_rate REAL DEFAULT 0.0,
-                advance REAL DEFAULT 0.0,
-                PRIMARY KEY (year, month)
-            )
-        """)
-        # Создаем таблицу для глобальных настроек
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS global_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        # self.conn.commit() # 'with' будет делать это автоматически
+        else:
+            # Актуальная база проверяется одним чтением PRAGMA user_version,
+            # остальные миграции выполняются по одной транзакции на версию
+            apply_migrations(self)
 
-    def add_or_update_entry(self, start_time_str, end_time_str, comment=""):
+        # Соединения для чтения открываем после миграций, когда схема уже актуальна
+        if wal and read_pool_size > 0:
+            self.read_pool = queue.Queue()
+            for _ in range(read_pool_size):
+                self.read_pool.put(self._open_read_connection())
+
+        # Методы оборачиваются последними, чтобы миграции не попадали в статистику методов
+        if self.stats is not None:
+            self.stats.instrument(self)
+
+    def _open_read_connection(self):
+        """Открывает дополнительное соединение только для чтения."""
+        conn = sqlite3.connect(f"file:{self.db_name}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=5000")
+        if self.stats is not None:
+            self.stats.attach(conn)
+        return conn
+
+    @contextmanager
+    def _reader(self):
         """
-        Добавляет новую или обновляет существующую запись для указанной даты.
-        Проверка осуществляется по дате из start_time.
+        Выдает соединение для чтения: свободное из пула в режиме WAL
+        или основное соединение под блокировкой в обычном режиме.
         """
-        start_dt = datetime.fromisoformat(start_time_str)
-        end_dt = datetime.fromisoformat(end_time_str)
-        entry_date = start_dt.date().isoformat()
+        if self.read_pool is None:
+            with self.lock:
+                yield self.conn
+            return
+        conn = self.read_pool.get()
+        try:
+            yield conn
+        finally:
+            self.read_pool.put(conn)
+
+    def close(self):
+        """Закрывает все соединения с базой данных."""
+        with self.lock:
+            self.conn.close()
+        if self.read_pool is not None:
+            while not self.read_pool.empty():
+                self.read_pool.get().close()
 
-        with self.conn:
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Открывает транзакцию записи сразу (BEGIN IMMEDIATE), чтобы чтение старых
+        значений и последующая запись выполнялись атомарно.
+        """
+        with self.lock:
             cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
 
-            # 1. Проверяем, есть ли запись для этой даты
-            cursor.execute("SELECT id FROM work_entries WHERE date(start_time) = ?", (entry_date,))
-            existing_entry = cursor.fetchone()
+    def _get_lunch_duration_hours(self, cursor, employee_id):
+        """
+        Читает продолжительность обеда сотрудника внутри текущей транзакции записи.
+        :raises ValueError: если сотрудника нет. Записи такого сотрудника не видны
+                            ни в интерфейсе, ни в отчетах, поэтому их нельзя сохранять.
+        """
+        cursor.execute("SELECT lunch_duration_hours FROM employees WHERE id = ?", (employee_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Сотрудник с id {employee_id} не найден")
+        return float(row['lunch_duration_hours'])
 
-            if existing_entry:
-                # 2. Если есть - обновляем её
-                entry_id = existing_entry['id']
-                cursor.execute(
-                    """
-                    UPDATE work_entries 
-                    SET start_time = ?, end_time = ?, comment = ?
-                    WHERE id = ?
-                    """,
-                    (start_time_str, end_time_str, comment, entry_id)
+    def _apply_summary_delta(self, cursor, employee_id, entry_date, days, minutes_with_lunch, minutes_without_lunch):
+        """Прибавляет изменение итогов к строке monthly_summary сотрудника за месяц, к которому относится entry_date."""
+        year, month = entry_date.year, entry_date.month
+        timeline = self.get_rate_timeline(employee_id)
+        cursor.execute(
+            """
+            INSERT INTO monthly_summary
+                (employee_id, year, month, work_days_count, total_minutes_with_lunch, total_minutes_without_lunch,
+                 hourly_rate, advance)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(employee_id, year, month) DO UPDATE SET
+            work_days_count = work_days_count + excluded.work_days_count,
+            total_minutes_with_lunch = total_minutes_with_lunch + excluded.total_minutes_with_lunch,
+            total_minutes_without_lunch = total_minutes_without_lunch + excluded.total_minutes_without_lunch
+            """,
+            (
+                employee_id, year, month, days, minutes_with_lunch, minutes_without_lunch,
+                timeline.rate_for(year, month), timeline.advance_for(year, month),
+            )
+        )
+
+    def add_or_update_entry(self, start_time_str, end_time_str, comment="", employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Добавляет новую или обновляет существующую запись сотрудника для указанной даты.
+        Проверка осуществляется по дате из start_time (ключ дня work_date)
+        одним запросом INSERT ... ON CONFLICT, без предварительного SELECT.
+        :param start_time_str: время начала - ISO-строка "ГГГГ-ММ-ДД ЧЧ:ММ:СС" или datetime
+        :param end_time_str: время окончания - ISO-строка или datetime
+        :param employee_id: сотрудник, которому принадлежит запись
+        """
+        work_date, start_seconds, end_seconds, duration = _entry_values(start_time_str, end_time_str)
+        start_dt = from_epoch(start_seconds)
+
+        with self._write_transaction() as cursor:
+            lunch_duration_hours = self._get_lunch_duration_hours(cursor, employee_id)
+            cursor.execute(
+                "SELECT duration FROM work_entries WHERE employee_id = ? AND work_date = ?", (employee_id, work_date)
+            )
+            old_entry = cursor.fetchone()
+            cursor.execute(
+                """
+                INSERT INTO work_entries (employee_id, work_date, start_time, end_time, duration, comment)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(employee_id, work_date) DO UPDATE SET
+                start_time=excluded.start_time,
+                end_time=excluded.end_time,
+                duration=excluded.duration,
+                comment=excluded.comment
+                """,
+                (employee_id, work_date, start_seconds, end_seconds, duration, comment)
+            )
+
+            # Обновляем итоги месяца на разницу между новой и старой записью
+            new_with_lunch, new_without_lunch = shift_minutes(duration, lunch_duration_hours)
+            if old_entry:
+                old_with_lunch, old_without_lunch = shift_minutes(old_entry['duration'], lunch_duration_hours)
+                self._apply_summary_delta(
+                    cursor, employee_id, start_dt, 0,
+                    new_with_lunch - old_with_lunch, new_without_lunch - old_without_lunch
                 )
             else:
-                # 3. Если нет - добавляем новую
-                cursor.execute(
-                    "INSERT INTO work_entries (start_time, end_time, comment) VALUES (?, ?, ?)",
-                    (start_time_str, end_time_str, comment)
-                )
+                self._apply_summary_delta(cursor, employee_id, start_dt, 1, new_with_lunch, new_without_lunch)
+        self.cache.invalidate_month(start_dt.year, start_dt.month)
+
+    def import_entries(self, entries, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Массово добавляет или обновляет записи сотрудника в одной транзакции через executemany.
+        Правило то же, что у add_or_update_entry: одна запись на день, новая
+        запись за существующий день заменяет старую.
+        :param entries: итерируемый объект кортежей (start_time, end_time, comment),
+                        где время - проверенная ISO-строка или datetime.
+                        Читается потоково, целиком в память не загружается.
+        :return: словарь с количеством добавленных (inserted) и обновленных (updated) записей.
+        """
+        processed = 0
+
+        def with_columns():
+            nonlocal processed
+            for start_time, end_time, comment in entries:
+                processed += 1
+                yield (employee_id, *_entry_values(start_time, end_time), comment)
 
-    def get_entry_by_date(self, entry_date):
+        with self._write_transaction() as cursor:
+            self._get_lunch_duration_hours(cursor, employee_id) # Проверяем сотрудника до чтения файла
+            cursor.execute("SELECT COUNT(*) FROM work_entries WHERE employee_id = ?", (employee_id,))
+            count_before = cursor.fetchone()[0]
+            cursor.executemany(
+                """
+                INSERT INTO work_entries (employee_id, work_date, start_time, end_time, duration, comment)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(employee_id, work_date) DO UPDATE SET
+                start_time=excluded.start_time,
+                end_time=excluded.end_time,
+                duration=excluded.duration,
+                comment=excluded.comment
+                """,
+                with_columns()
+            )
+            cursor.execute("SELECT COUNT(*) FROM work_entries WHERE employee_id = ?", (employee_id,))
+            inserted = cursor.fetchone()[0] - count_before
+            # Итоги затронутых месяцев проще и быстрее пересчитать одним запросом
+            self._rebuild_monthly_summary(cursor, employee_id)
+        self.cache.clear()
+        return {"inserted": inserted, "updated": processed - inserted}
+
+    def get_entry_by_date(self, entry_date, employee_id=DEFAULT_EMPLOYEE_ID):
         """
-        Возвращает запись за указанную дату.
+        Возвращает запись сотрудника за указанную дату.
         :param entry_date: дата в виде объекта datetime.date
         :return: словарь с данными записи или None, если запись не найдена.
         """
-        cursor = self.conn.cursor()
-        # Используем функцию date() из SQLite для сравнения только дат
-        cursor.execute("SELECT * FROM work_entries WHERE date(start_time) = ?", (entry_date.isoformat(),))
-        entry = cursor.fetchone()
-        return entry
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            # Ищем по индексированному ключу (сотрудник, день)
+            cursor.execute(
+                "SELECT * FROM work_entries WHERE employee_id = ? AND work_date = ?",
+                (employee_id, entry_date.isoformat())
+            )
+            entry = cursor.fetchone()
+            return entry
 
-    def delete_entry_by_date(self, entry_date):
+    def delete_entry_by_date(self, entry_date, employee_id=DEFAULT_EMPLOYEE_ID):
         """
-        Удаляет запись за указанную дату.
+        Удаляет запись сотрудника за указанную дату.
         :param entry_date: дата в виде объекта datetime.date
         """
-        with self.conn:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM work_entries WHERE date(start_time) = ?", (entry_date.isoformat(),))
-
-    def get_all_entries(self):
-        """Возвращает все записи из базы данных, отсортированные по дате."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM work_entries ORDER BY start_time ASC")
-        entries = cursor.fetchall()
-        return entries
-
-    def get_entries_for_month(self, year, month):
-        """Возвращает все записи за указанный месяц и год, отсортированные по дате."""
-        cursor = self.conn.cursor()
-        # Используем strftime для извлечения года и месяца из текстового поля даты
-        cursor.execute(
-            "SELECT * FROM work_entries WHERE strftime('%Y', start_time) = ? AND strftime('%m', start_time) = ? ORDER BY start_time ASC",
-            (str(year), f"{month:02d}")
-        )
-        entries = cursor.fetchall()
-        return entries
+        key = (employee_id, entry_date.isoformat())
+        with self._write_transaction() as cursor:
+            lunch_duration_hours = self._get_lunch_duration_hours(cursor, employee_id)
+            cursor.execute("SELECT duration FROM work_entries WHERE employee_id = ? AND work_date = ?", key)
+            old_entry = cursor.fetchone()
+            if not old_entry:
+                return
+            cursor.execute("DELETE FROM work_entries WHERE employee_id = ? AND work_date = ?", key)
+            old_with_lunch, old_without_lunch = shift_minutes(old_entry['duration'], lunch_duration_hours)
+            self._apply_summary_delta(cursor, employee_id, entry_date, -1, -old_with_lunch, -old_without_lunch)
+        self.cache.invalidate_month(entry_date.year, entry_date.month)
 
-    def get_settings_for_month(self, year, month):
+    def get_all_entries(self, employee_id=DEFAULT_EMPLOYEE_ID):
+        """Возвращает все записи сотрудника, отсортированные по дате."""
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM work_entries WHERE employee_id = ? ORDER BY start_time ASC", (employee_id,))
+            entries = cursor.fetchall()
+            return entries
+
+    def iter_entries(self, start=None, end=None, batch_size=500, employee_id=DEFAULT_EMPLOYEE_ID):
         """
-        Возвращает часовую ставку и аванс для указанного месяца. 
-        Ставка наследуется с предыдущих месяцев, аванс - нет.
+        Постранично перебирает записи сотрудника (все или из полуинтервала [start, end)) в порядке дат.
+        Каждая страница из batch_size записей читается отдельным запросом по индексу
+        (employee_id, start_time), поэтому память не растет с размером истории, а соединение
+        не удерживается между страницами.
         """
-        cursor = self.conn.cursor()
+        after = None
+        while True:
+            batch = self.get_entries_page(start, end, after, batch_size, employee_id=employee_id)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1]['start_time']
 
-        # 1. Получаем аванс ТОЛЬКО для этого месяца. Если его нет, аванс равен 0.
-        cursor.execute("SELECT advance FROM monthly_settings WHERE year = ? AND month = ?", (year, month))
-        advance_row = cursor.fetchone()
-        advance = advance_row['advance'] if advance_row else 0.0
+    def get_entries_page(self, start=None, end=None, after=None, limit=100, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает одну страницу записей сотрудника (всех или из полуинтервала [start, end)) в порядке дат.
+        Страница выбирается по индексу (employee_id, start_time) (keyset-пагинация), поэтому ее стоимость
+        не зависит от того, насколько далеко она от начала периода.
+        :param after: start_time последней записи предыдущей страницы; None - первая страница.
+        :param limit: максимальное количество записей на странице.
+        """
+        if after is not None:
+            # Следующие страницы продолжаются строго после последней записи
+            query, params = "SELECT * FROM work_entries WHERE employee_id = ? AND start_time > ?", [employee_id, after]
+        else:
+            query = "SELECT * FROM work_entries WHERE employee_id = ? AND start_time >= ?"
+            params = [employee_id, to_epoch(start) if start is not None else -(2 ** 63)]
+        if end is not None:
+            query += " AND start_time < ?"
+            params.append(to_epoch(end))
+        query += " ORDER BY start_time ASC LIMIT ?"
+        params.append(limit)
+        with self._reader() as conn:
+            return conn.execute(query, params).fetchall()
 
-        # 2. Получаем последнюю установленную ставку до или в этом месяце.
-        cursor.execute(
-            """
-            SELECT hourly_rate FROM monthly_settings 
-            WHERE (year * 100 + month) <= ?
-            ORDER BY year DESC, month DESC 
-            LIMIT 1
-            """,
-            (year * 100 + month,)
+    def get_month_summaries(self, start_month=None, end_month=None, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает строки monthly_summary сотрудника за диапазон месяцев (или за все время)
+        в хронологическом порядке.
+        :param start_month: первый месяц, кортеж (год, месяц), включительно.
+        :param end_month: последний месяц, кортеж (год, месяц), включительно.
+        """
+        query = "SELECT * FROM monthly_summary WHERE employee_id = ?"
+        params = [employee_id]
+        if start_month is not None:
+            query += " AND (year, month) >= (?, ?)"
+            params.extend(start_month)
+        if end_month is not None:
+            query += " AND (year, month) <= (?, ?)"
+            params.extend(end_month)
+        query += " ORDER BY year, month"
+        with self._reader() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def get_entries_for_month(self, year, month, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает все записи сотрудника за указанный месяц и год, отсортированные по дате.
+        Результат кэшируется до ближайшей записи в этот месяц, поэтому изменять
+        возвращенный список нельзя.
+        """
+        start, end = month_bounds(year, month)
+        return self.cache.get_or_compute(
+            ("entries", year, month, employee_id),
+            lambda: self.get_entries_between(start, end, employee_id=employee_id)
         )
-        rate_row = cursor.fetchone()
-        hourly_rate = rate_row['hourly_rate'] if rate_row else 0.0
-        
-        return {"hourly_rate": hourly_rate, "advance": advance}
-
-    def save_settings_for_month(self, year, month, hourly_rate, advance):
-        """Сохраняет или обновляет настройки для указанного месяца."""
-        with self.conn:
-            cursor = self.conn.cursor()
+
+    def get_entries_between(self, start, end, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает записи сотрудника, начатые в полуинтервале [start, end), отсортированные по дате.
+        :param start: начало периода (datetime.date, datetime.datetime, ISO-строка или секунды), включительно
+        :param end: конец периода (datetime.date, datetime.datetime, ISO-строка или секунды), не включительно
+        :return: строки, в которых start_time, end_time и duration - целые секунды.
+        """
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            # Диапазон обслуживается индексом idx_work_entries_employee_start
             cursor.execute(
-                """
-                INSERT INTO monthly_settings (year, month, hourly_rate, advance) 
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(year, month) DO UPDATE SET
-                hourly_rate=excluded.hourly_rate,
-                advance=excluded.advance
+                "SELECT * FROM work_entries WHERE employee_id = ? AND start_time >= ? AND start_time < ? "
+                "ORDER BY start_time ASC",
+                (employee_id, to_epoch(start), to_epoch(end))
+            )
+            entries = cursor.fetchall()
+            return entries
+
+    def get_epoch_times_between(self, start, end, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает время начала и окончания записей сотрудника из полуинтервала [start, end)
+        в виде кортежей (start, end) целых секунд от 1970-01-01 (время "по часам", без часового пояса).
+        Предназначено для пакетных расчетов, где объекты sqlite3.Row не нужны.
+        Запрос читает только покрывающий индекс idx_work_entries_employee_start.
+        """
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(
+                "SELECT start_time, end_time FROM work_entries "
+                "WHERE employee_id = ? AND start_time >= ? AND start_time < ? ORDER BY start_time ASC",
+                (employee_id, to_epoch(start), to_epoch(end))
+            )
+            return cursor.fetchall()
+
+    def get_totals_between(self, start, end, rules, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Считает итоги по записям сотрудника из полуинтервала [start, end) одним SQL-запросом.
+        Продолжительность берется из целочисленного столбца duration, поэтому
+        функции дат не нужны, а пороги вычета обеда сравниваются так же, как в Python.
+        Запрос читает только покрывающий индекс idx_work_entries_employee_start.
+        :param rules: правила вычета обеда - список пар (порог в минутах, вычет в минутах),
+                      упорядоченный по убыванию порога (см. calculator.lunch_rules).
+        :return: словарь work_days_count, total_minutes_with_lunch, total_minutes_without_lunch
+        """
+        lunch_case, params = _lunch_case_sql(rules)
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                SELECT
+                    COUNT(*) AS work_days_count,
+                    COALESCE(SUM(minutes), 0) AS total_minutes_with_lunch,
+                    COALESCE(SUM(MAX(minutes - {lunch_case}, 0)), 0) AS total_minutes_without_lunch
+                FROM (
+                    SELECT duration / 60.0 AS minutes
+                    FROM work_entries
+                    WHERE employee_id = ? AND start_time >= ? AND start_time < ?
+                )
                 """,
-                (year, month, hourly_rate, advance)
+                (*params, employee_id, to_epoch(start), to_epoch(end))
             )
+            return dict(cursor.fetchone())
+
+    def get_month_summary(self, year, month, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает предрасчитанные итоги сотрудника за месяц из monthly_summary: work_days_count,
+        total_minutes_with_lunch, total_minutes_without_lunch, hourly_rate и advance.
+        Если за месяц нет записей, итоги нулевые, а ставка и аванс берутся из настроек.
+        """
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM monthly_summary WHERE employee_id = ? AND year = ? AND month = ?",
+                (employee_id, year, month)
+            )
+            row = cursor.fetchone()
+        if row:
+            return dict(row)
+        settings = self.get_settings_for_month(year, month, employee_id=employee_id)
+        return {
+            "employee_id": employee_id,
+            "year": year,
+            "month": month,
+            "work_days_count": 0,
+            "total_minutes_with_lunch": 0.0,
+            "total_minutes_without_lunch": 0.0,
+            "hourly_rate": settings["hourly_rate"],
+            "advance": settings["advance"],
+        }
+
+    def rebuild_monthly_summary(self, employee_id=None):
+        """
+        Полностью пересчитывает таблицу monthly_summary по записям и настройкам.
+        Используется при создании таблицы, при смене продолжительности обеда
+        и для проверки согласованности.
+        :param employee_id: пересчитать итоги одного сотрудника; None - всех сотрудников.
+        :return: список (сотрудник, год, месяц), итоги которых отличались от сохраненных.
+        """
+        with self._write_transaction() as cursor:
+            changed = self._rebuild_monthly_summary(cursor, employee_id)
+        self.cache.clear()
+        return changed
+
+    def _rebuild_monthly_summary(self, cursor, employee_id=None):
+        if employee_id is None:
+            cursor.execute("SELECT id FROM employees ORDER BY id")
+            employee_ids = [row['id'] for row in cursor.fetchall()]
+        else:
+            employee_ids = [employee_id]
+        changed = []
+        for employee in employee_ids:
+            changed.extend(
+                (employee, year, month) for year, month in self._rebuild_employee_summary(cursor, employee)
+            )
+        return changed
+
+    def _rebuild_employee_summary(self, cursor, employee_id):
+        """Пересчитывает итоги одного сотрудника. :return: список (год, месяц) с расхождениями."""
+        cursor.execute("SELECT * FROM monthly_summary WHERE employee_id = ?", (employee_id,))
+        old_rows = {(row['year'], row['month']): dict(row) for row in cursor.fetchall()}
+
+        # Правила вычета обеда у каждого сотрудника свои
+        lunch_case, params = _lunch_case_sql(lunch_rules(self._get_lunch_duration_hours(cursor, employee_id)))
+        cursor.execute("DELETE FROM monthly_summary WHERE employee_id = ?", (employee_id,))
+        cursor.execute(
+            f"""
+            INSERT INTO monthly_summary
+                (employee_id, year, month, work_days_count, total_minutes_with_lunch, total_minutes_without_lunch)
+            SELECT
+                ?,
+                CAST(substr(work_date, 1, 4) AS INTEGER),
+                CAST(substr(work_date, 6, 2) AS INTEGER),
+                COUNT(*),
+                SUM(minutes),
+                SUM(MAX(minutes - {lunch_case}, 0))
+            FROM (
+                SELECT work_date, duration / 60.0 AS minutes
+                FROM work_entries
+                WHERE employee_id = ?
+            )
+            GROUP BY 2, 3
+            """,
+            (employee_id, *params, employee_id)
+        )
+        cursor.execute("SELECT * FROM monthly_summary WHERE employee_id = ?", (employee_id,))
+        new_rows = {(row['year'], row['month']): dict(row) for row in cursor.fetchall()}
+
+        timeline = self.get_rate_timeline(employee_id)
+        cursor.executemany(
+            "UPDATE monthly_summary SET hourly_rate = ?, advance = ? WHERE employee_id = ? AND year = ? AND month = ?",
+            [
+                (timeline.rate_for(year, month), timeline.advance_for(year, month), employee_id, year, month)
+                for year, month in new_rows
+            ]
+        )
+
+        changed = []
+        for key in sorted(set(old_rows) | set(new_rows)):
+            old_row, new_row = old_rows.get(key), new_rows.get(key)
+            if old_row is None or new_row is None:
+                if (old_row or new_row)['work_days_count']:
+                    changed.append(key)
+                continue
+            if old_row['work_days_count'] != new_row['work_days_count'] or any(
+                abs(old_row[field] - new_row[field]) > 1e-6
+                for field in ('total_minutes_with_lunch', 'total_minutes_without_lunch')
+            ):
+                changed.append(key)
+        return changed
+
+    def get_rate_timeline(self, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает хронологию ставок и авансов сотрудника (RateTimeline).
+        Настройки сотрудника читаются из monthly_settings один раз, дальше хронология
+        поддерживается в актуальном состоянии методом save_settings_for_month.
+        """
+        timeline = self.rate_timelines.get(employee_id)
+        if timeline is not None:
+            return timeline
+        # Загрузка идет под блокировкой записи: пока настройки читаются, их никто не меняет,
+        # и загруженная хронология не может затереть уже обновленную save_settings_for_month.
+        # Читаем через основное соединение: внутри транзакции записи (миграции) оно видит ее изменения.
+        with self.lock:
+            timeline = self.rate_timelines.get(employee_id)
+            if timeline is None:
+                rows = self.conn.execute(
+                    "SELECT year, month, hourly_rate, advance FROM monthly_settings WHERE employee_id = ?",
+                    (employee_id,)
+                ).fetchall()
+                timeline = self.rate_timelines[employee_id] = RateTimeline(rows)
+        return timeline
+
+    def get_settings_for_month(self, year, month, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает часовую ставку и аванс сотрудника для указанного месяца. 
+        Ставка наследуется с предыдущих месяцев, аванс - нет.
+        """
+        return self.get_rate_timeline(employee_id).settings_for(year, month)
+
+    def save_settings_for_month(self, year, month, hourly_rate, advance, employee_id=DEFAULT_EMPLOYEE_ID):
+        """Сохраняет или обновляет настройки сотрудника для указанного месяца."""
+        # Хронология и транзакция меняются вместе, под одной блокировкой записи
+        with self.lock:
+            timeline = self.get_rate_timeline(employee_id)
+            next_key = timeline.next_key_after(year, month)
+            with self._write_transaction() as cursor:
+                self._get_lunch_duration_hours(cursor, employee_id) # Сотрудник должен существовать
+                cursor.execute(
+                    """
+                    INSERT INTO monthly_settings (employee_id, year, month, hourly_rate, advance) 
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(employee_id, year, month) DO UPDATE SET
+                    hourly_rate=excluded.hourly_rate,
+                    advance=excluded.advance
+                    """,
+                    (employee_id, year, month, hourly_rate, advance)
+                )
+                # Ставка действует до следующего месяца с собственной ставкой, аванс - только в этом месяце
+                if next_key is None:
+                    cursor.execute(
+                        "UPDATE monthly_summary SET hourly_rate = ? WHERE employee_id = ? AND (year, month) >= (?, ?)",
+                        (hourly_rate, employee_id, year, month)
+                    )
+                else:
+                    cursor.execute(
+                        "UPDATE monthly_summary SET hourly_rate = ? "
+                        "WHERE employee_id = ? AND (year, month) >= (?, ?) AND (year, month) < (?, ?)",
+                        (hourly_rate, employee_id, year, month, *divmod(next_key, 100))
+                    )
+                cursor.execute(
+                    "UPDATE monthly_summary SET advance = ? WHERE employee_id = ? AND year = ? AND month = ?",
+                    (advance, employee_id, year, month)
+                )
+            # Обновляем хронологию только после успешной фиксации транзакции
+            timeline.set(year, month, hourly_rate, advance)
+            # Новая ставка действует и в последующих месяцах
+            self.cache.invalidate_from(year, month)
 
     def get_global_setting(self, key, default=None):
         """Возвращает значение глобальной настройки."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT value FROM global_settings WHERE key = ?", (key,))
-        result = cursor.fetchone()
-        return result['value'] if result else default
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM global_settings WHERE key = ?", (key,))
+            result = cursor.fetchone()
+            return result['value'] if result else default
+
+    def get_global_settings(self, keys):
+        """Возвращает словарь {ключ: значение} для нескольких глобальных настроек (None, если не задана)."""
+        keys = list(keys)
+        values = dict.fromkeys(keys)
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in keys)
+            cursor.execute(f"SELECT key, value FROM global_settings WHERE key IN ({placeholders})", keys)
+            for row in cursor.fetchall():
+                values[row['key']] = row['value']
+        return values
 
     def set_global_setting(self, key, value):
         """Сохраняет или обновляет глобальную настройку."""
-        with self.conn:
-            cursor = self.conn.cursor()
-            cursor.execute("INSERT OR REPLACE INTO global_settings (key, value) VALUES (?, ?)", (key, str(value)))
+        self.set_global_settings({key: value})
+
+    def set_global_settings(self, values):
+        """
+        Сохраняет несколько глобальных настроек одной транзакцией.
+        Продолжительность обеда ('lunch_duration_hours') теперь хранится у сотрудника,
+        поэтому она сохраняется для основного сотрудника через set_lunch_duration_hours.
+        """
+        values = dict(values)
+        if 'lunch_duration_hours' in values:
+            self.set_lunch_duration_hours(values.pop('lunch_duration_hours'), DEFAULT_EMPLOYEE_ID)
+        if not values:
+            return
+        with self._write_transaction() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO global_settings (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()],
+            )
+
+    def get_employees(self):
+        """Возвращает всех сотрудников (id, name, lunch_duration_hours) в порядке добавления."""
+        with self._reader() as conn:
+            return conn.execute("SELECT id, name, lunch_duration_hours FROM employees ORDER BY id").fetchall()
+
+    def add_employee(self, name, lunch_duration_hours=1.0):
+        """
+        Добавляет сотрудника.
+        :return: id нового сотрудника.
+        :raises ValueError: если имя пустое или сотрудник с таким именем уже есть.
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("Имя сотрудника не может быть пустым")
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute(
+                    "INSERT INTO employees (name, lunch_duration_hours) VALUES (?, ?)",
+                    (name, float(lunch_duration_hours))
+                )
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Сотрудник «{name}» уже есть") from None
+
+    def get_lunch_duration_hours(self, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Возвращает продолжительность обеда сотрудника в часах.
+        :raises ValueError: если сотрудника нет.
+        """
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT lunch_duration_hours FROM employees WHERE id = ?", (employee_id,)
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Сотрудник с id {employee_id} не найден")
+        return float(row['lunch_duration_hours'])
+
+    def set_lunch_duration_hours(self, lunch_duration_hours, employee_id=DEFAULT_EMPLOYEE_ID):
+        """
+        Сохраняет продолжительность обеда сотрудника и пересчитывает его итоги.
+        Если значение не изменилось, ничего не делает: полный пересчет и сброс кэша
+        при каждом сохранении настроек свели бы на нет инкрементальные итоги.
+        :return: True, если значение изменилось.
+        """
+        lunch_duration_hours = float(lunch_duration_hours)
+        with self._write_transaction() as cursor:
+            if self._get_lunch_duration_hours(cursor, employee_id) == lunch_duration_hours:
+                return False
+            cursor.execute(
+                "UPDATE employees SET lunch_duration_hours = ? WHERE id = ?",
+                (lunch_duration_hours, employee_id)
+            )
+            # Продолжительность обеда влияет на итоги всех месяцев сотрудника
+            self._rebuild_monthly_summary(cursor, employee_id)
+        self.cache.clear()
+        return True
+
+    def get_diagnostics(self):
+        """
+        Возвращает сведения для диагностики: размер файла базы и WAL, количество страниц,
+        версию схемы, статистику кэша и, если включена, статистику запросов по методам.
+        """
+        with self._reader() as conn:
+            pragmas = {
+                name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("page_count", "page_size", "freelist_count", "user_version")
+            }
+        wal_path = self.db_name + "-wal"
+        return {
+            "path": os.path.abspath(self.db_name),
+            "file_size": os.path.getsize(self.db_name) if os.path.exists(self.db_name) else 0,
+            "wal_size": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            "page_count": pragmas["page_count"],
+            "page_size": pragmas["page_size"],
+            "freelist_count": pragmas["freelist_count"],
+            "schema_version": pragmas["user_version"],
+            "cache": self.cache.stats(),
+            "queries": self.stats.snapshot() if self.stats is not None else None,
+        }
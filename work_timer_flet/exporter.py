@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Потоковый экспорт записей о рабочих днях в CSV и JSON Lines.
+
+Записи читаются из базы страницами и сразу пишутся в файл, поэтому
+экспорт истории за много лет не требует памяти больше одной страницы.
+Формат полей совместим с importer.py.
+"""
+
+import csv
+import json
+import os
+
+from calculator import shift_minutes
+from migrations import DEFAULT_EMPLOYEE_ID
+from importer import TIME_FORMAT
+from timestamps import from_epoch
+
+FIELDS = ["start_time", "end_time", "comment"]
+HOURS_FIELDS = ["hours", "net_hours"]
+
+
+def iter_export_rows(db_manager, start=None, end=None, with_hours=False, batch_size=500,
+                     employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Генератор строк для экспорта записей сотрудника.
+    :param with_hours: добавить продолжительность дня в часах с обедом (hours)
+                       и без обеда (net_hours) по правилам calculator.
+    """
+    lunch_duration_hours = db_manager.get_lunch_duration_hours(employee_id)
+    for entry in db_manager.iter_entries(start, end, batch_size=batch_size, employee_id=employee_id):
+        row = {
+            "start_time": from_epoch(entry['start_time']).strftime(TIME_FORMAT),
+            "end_time": from_epoch(entry['end_time']).strftime(TIME_FORMAT),
+            "comment": entry['comment'] or "",
+        }
+        if with_hours:
+            minutes, net_minutes = shift_minutes(entry['duration'], lunch_duration_hours)
+            row["hours"] = round(minutes / 60.0, 2)
+            row["net_hours"] = round(net_minutes / 60.0, 2)
+        yield row
+
+
+def export_file(db_manager, path, file_format=None, start=None, end=None, with_hours=False,
+                employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Экспортирует записи в файл CSV или JSON Lines.
+
+    :param db_manager: Экземпляр DatabaseManager.
+    :param path: Путь к создаваемому файлу.
+    :param file_format: "csv" или "jsonl"; по умолчанию определяется по расширению.
+    :param start: Начало периода включительно (необязательно).
+    :param end: Конец периода не включительно (необязательно).
+    :param with_hours: Добавить рассчитанные часы с обедом и без обеда.
+    :param employee_id: Сотрудник, чьи записи выгружаются.
+    :return: количество выгруженных записей.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format not in ("csv", "jsonl"):
+        raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+    db_manager.get_lunch_duration_hours(employee_id) # Неизвестный сотрудник - ошибка до создания файла
+    rows = iter_export_rows(db_manager, start, end, with_hours, employee_id=employee_id)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=FIELDS + (HOURS_FIELDS if with_hours else []))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+    return count
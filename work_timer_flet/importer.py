@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Массовый импорт записей о рабочих днях из CSV и JSON.
+
+Поддерживаемые поля записи:
+    start_time, end_time - дата и время в ISO-формате ("2024-01-31 09:00:00"), либо
+    date, start, end     - дата ("2024-01-31") и время ("09:00") отдельно;
+    comment              - необязательный комментарий.
+
+CSV читается построчно, JSON Lines (.jsonl) - построчно, обычный JSON
+ожидается в виде массива объектов.
+"""
+
+import csv
+import json
+import os
+from datetime import datetime
+
+from migrations import DEFAULT_EMPLOYEE_ID
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_REPORTED_ERRORS = 20
+
+
+def parse_record(record):
+    """
+    Проверяет одну запись и приводит ее к виду, который хранится в базе.
+    :param record: словарь с полями записи или строка JSON Lines с таким объектом.
+    :return: кортеж (start_time_str, end_time_str, comment).
+    :raises ValueError: если запись некорректна.
+    """
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("запись должна быть объектом с полями")
+    if record.get("date"):
+        # Без времени fromisoformat вернул бы полночь, и день сохранился бы как смена в 0 минут
+        if not record.get("start") or not record.get("end"):
+            raise ValueError("для записи с полем date нужны поля start и end")
+        start_dt = datetime.fromisoformat(f"{record['date']} {record['start']}")
+        end_dt = datetime.fromisoformat(f"{record['date']} {record['end']}")
+    elif record.get("start_time") and record.get("end_time"):
+        start_dt = datetime.fromisoformat(str(record["start_time"]))
+        end_dt = datetime.fromisoformat(str(record["end_time"]))
+    else:
+        raise ValueError("нужны поля start_time и end_time или date, start и end")
+    if end_dt < start_dt:
+        raise ValueError("время окончания раньше времени начала")
+    return start_dt.strftime(TIME_FORMAT), end_dt.strftime(TIME_FORMAT), record.get("comment") or ""
+
+
+def iter_csv_records(file):
+    """Построчно читает записи из CSV с заголовком."""
+    yield from csv.DictReader(file)
+
+
+def iter_json_records(file, json_lines):
+    """
+    Читает записи из JSON Lines построчно или из JSON-массива целиком.
+    Строки JSON Lines разбираются в parse_record, чтобы ошибка в одной
+    строке отклоняла только ее, а не весь файл.
+    """
+    if not json_lines:
+        yield from json.load(file)
+        return
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def import_file(db_manager, path, file_format=None, employee_id=DEFAULT_EMPLOYEE_ID):
+    """
+    Импортирует записи сотрудника из файла одной транзакцией.
+
+    :param db_manager: Экземпляр DatabaseManager.
+    :param path: Путь к файлу CSV, JSON или JSON Lines.
+    :param file_format: "csv", "json" или "jsonl"; по умолчанию определяется по расширению.
+    :param employee_id: Сотрудник, к которому относятся записи файла.
+    :return: словарь inserted, updated, rejected и errors - список первых ошибок
+             вида (номер записи, текст ошибки).
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format not in ("csv", "json", "jsonl"):
+        raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+
+    rejected = 0
+    errors = []
+
+    def valid_entries(records):
+        nonlocal rejected
+        for number, record in enumerate(records, start=1):
+            try:
+                yield parse_record(record)
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((number, str(e)))
+
+    with open(path, encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            records = iter_csv_records(file)
+        else:
+            records = iter_json_records(file, json_lines=file_format == "jsonl")
+        result = db_manager.import_entries(valid_entries(records), employee_id=employee_id)
+
+    result.update(rejected=rejected, errors=errors)
+    return result
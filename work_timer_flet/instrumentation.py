@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Необязательный сбор статистики запросов к базе данных.
+
+Для каждого публичного метода DatabaseManager считаются вызовы, выполненные
+SQL-запросы (через trace callback sqlite3) и гистограмма длительности вызовов.
+Включается параметром DatabaseManager(instrument=True); без него методы
+не оборачиваются и накладных расходов нет.
+"""
+
+import inspect
+import json
+import threading
+import time
+from functools import wraps
+
+# Верхние границы корзин гистограммы длительности, в миллисекундах
+LATENCY_BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 50, 100, 500]
+
+
+def _bucket_labels():
+    """Подписи корзин гистограммы: "<=0.1", ..., ">500"."""
+    return [f"<={bound:g}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]:g}"]
+
+
+class QueryStats:
+    """
+    Статистика вызовов методов и SQL-запросов.
+
+    Запрос относится к самому вложенному выполняющемуся методу в том же потоке;
+    запросы вне методов (например, миграции) учитываются под именем "<other>".
+    Данные можно обновлять из нескольких потоков.
+    """
+    OTHER = "<other>"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.methods = {}
+        self.started_at = time.time()
+
+    def _method_stats(self, name):
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = {
+                "calls": 0,
+                "queries": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        return stats
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def trace_statement(self, statement):
+        """Trace callback для sqlite3.Connection.set_trace_callback: считает выполненные запросы."""
+        stack = self._stack()
+        name = stack[-1] if stack else self.OTHER
+        with self.lock:
+            self._method_stats(name)["queries"] += 1
+
+    def attach(self, conn):
+        """Подключает подсчет запросов к соединению."""
+        conn.set_trace_callback(self.trace_statement)
+
+    def record(self, name, elapsed_ms):
+        """Учитывает один вызов метода длительностью elapsed_ms."""
+        bucket = len(LATENCY_BUCKETS_MS)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                bucket = index
+                break
+        with self.lock:
+            stats = self._method_stats(name)
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["histogram"][bucket] += 1
+
+    def timed(self, name, method):
+        """Оборачивает метод: замеряет длительность вызова и относит к нему запросы."""
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(name)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - started) * 1000)
+                stack.pop()
+        return wrapper
+
+    def instrument(self, obj):
+        """
+        Оборачивает все публичные методы объекта на уровне экземпляра.
+        Генераторы не оборачиваются: их время выполнения не совпадает со временем вызова,
+        а вызываемые ими методы замеряются сами.
+        """
+        for name, method in inspect.getmembers(obj, inspect.ismethod):
+            if name.startswith("_") or inspect.isgeneratorfunction(method):
+                continue
+            setattr(obj, name, self.timed(name, method))
+
+    def snapshot(self):
+        """Возвращает копию статистики в виде словаря, пригодного для JSON."""
+        with self.lock:
+            methods = {
+                name: {
+                    **stats,
+                    "total_ms": round(stats["total_ms"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                    "histogram": dict(zip(_bucket_labels(), stats["histogram"])),
+                }
+                for name, stats in self.methods.items()
+            }
+        return {"since": self.started_at, "methods": methods}
+
+    def reset(self):
+        """Обнуляет статистику."""
+        with self.lock:
+            self.methods.clear()
+            self.started_at = time.time()
+
+
+def format_diagnostics(diagnostics):
+    """Превращает результат DatabaseManager.get_diagnostics() в текст для диалога."""
+    lines = [
+        f"Файл БД: {diagnostics['file_size'] / 1024:.1f} КБ"
+        + (f" (+ WAL {diagnostics['wal_size'] / 1024:.1f} КБ)" if diagnostics['wal_size'] else ""),
+        f"Страниц: {diagnostics['page_count']} по {diagnostics['page_size']} Б, свободных {diagnostics['freelist_count']}",
+        f"Версия схемы: {diagnostics['schema_version']}",
+        f"Кэш отчетов: {diagnostics['cache']}",
+    ]
+    queries = diagnostics.get("queries")
+    if not queries:
+        lines.append("Статистика запросов отключена")
+        return "\n".join(lines)
+    methods = sorted(queries["methods"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    lines.append("")
+    lines.append("Метод: вызовов, запросов, среднее/макс. мс")
+    for name, stats in methods:
+        lines.append(
+            f"{name}: {stats['calls']}, {stats['queries']}, {stats['mean_ms']:.2f}/{stats['max_ms']:.2f}"
+        )
+        filled = {label: count for label, count in stats["histogram"].items() if count}
+        if filled:
+            lines.append("    " + ", ".join(f"{label} мс: {count}" for label, count in filled.items()))
+    return "\n".join(lines)
+
+
+def dump_diagnostics(diagnostics, path):
+    """Сохраняет результат DatabaseManager.get_diagnostics() в JSON-файл."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(diagnostics, file, ensure_ascii=False, indent=2)
+    return path
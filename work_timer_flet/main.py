@@ -1,17 +1,70 @@
+import time
+
+STARTUP_TIME = time.perf_counter() # Отсчет времени до первого кадра
+
 import flet as ft
 import os
 import asyncio
+import importlib
+import inspect
 
-# Импортируем наши классы-экраны
-from database_manager import DatabaseManager
+from async_database import AsyncDatabaseManager
 from updater import Updater
-from views.main_view import MainView
-from views.add_edit_view import AddEditView
-from views.history_view import HistoryView
-from views.settings_view import SettingsView
 
 APP_VERSION = "1.0.1" # --- ГЛАВНАЯ ВЕРСИЯ ПРИЛОЖЕНИЯ ---
 
+# Экраны приложения: имя -> (модуль, класс). Модули импортируются при первом переходе.
+SCREENS = {
+    "main": ("views.main_view", "MainView"),
+    "add_edit": ("views.add_edit_view", "AddEditView"),
+    "history": ("views.history_view", "HistoryView"),
+    "settings": ("views.settings_view", "SettingsView"),
+}
+
+
+class ScreenRegistry:
+    """
+    Реестр экранов. Экран создается при первом обращении к нему
+    (обычно при первом переходе) и дальше переиспользуется, поэтому
+    при запуске строится только главный экран.
+    """
+    def __init__(self, switch_screen, screens=SCREENS):
+        self.switch_screen = switch_screen
+        self._classes = screens
+        self._screens = {}
+
+    def __getitem__(self, name):
+        screen = self._screens.get(name)
+        if screen is None:
+            started = time.perf_counter()
+            module_name, class_name = self._classes[name]
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            screen = screen_class(self.switch_screen)
+            # Экраны переключаются через реестр, а не через готовые экземпляры
+            screen.set_screens(self)
+            self._screens[name] = screen
+            print(f"Экран {name} создан за {(time.perf_counter() - started) * 1000:.1f} мс")
+        return screen
+
+
+def remove_old_update_file(app_data_dir):
+    """Удаляет APK, оставшийся от прошлого обновления."""
+    try:
+        old_apk_path = os.path.join(app_data_dir, "update.apk")
+        if os.path.exists(old_apk_path):
+            os.remove(old_apk_path)
+            print(f"Старый файл обновления удален: {old_apk_path}")
+    except Exception as e:
+        print(f"Не удалось удалить старый файл обновления: {e}")
+
+
+def open_database(db_path):
+    """Открывает базу данных. Вызывается в рабочем потоке AsyncDatabaseManager."""
+    # Импорт модулей базы и расчетов тоже уходит из критического пути запуска
+    from database_manager import DatabaseManager
+    # Статистика запросов нужна для диалога диагностики (долгое нажатие на заголовок)
+    return DatabaseManager(db_name=db_path, instrument=True)
+
 async def main(page: ft.Page):
     # 1. Настраиваем окно
     page.title = "Work Timer" # Заголовок окна, не виден на Android
@@ -29,30 +82,55 @@ async def main(page: ft.Page):
         # Если мы на ПК (переменная не установлена), используем текущую папку
         app_data_dir = "."
 
-    # --- Очистка старого файла обновления ---
-    # При каждом запуске проверяем, не остался ли скачанный APK от прошлого обновления.
-    try:
-        old_apk_path = os.path.join(app_data_dir, "update.apk")
-        if os.path.exists(old_apk_path):
-            os.remove(old_apk_path)
-            print(f"Старый файл обновления удален: {old_apk_path}")
-    except Exception as e:
-        print(f"Не удалось удалить старый файл обновления: {e}")
-
     db_path = os.path.join(app_data_dir, "work_time_flet.db")
 
     # --- Настраиваем AppBar и отладочную информацию ---
     title_text = f"Work Timer v{APP_VERSION}"
     
-    # Создаем диалоговое окно для показа пути к БД
+    # Создаем диалоговое окно диагностики: путь к БД, размер файла и статистика запросов
+    diagnostics_text = ft.Text("", size=12, font_family="monospace", selectable=True)
+    diagnostics = {}
+
+    async def dump_diagnostics_to_file(e):
+        from instrumentation import dump_diagnostics
+        path = os.path.join(app_data_dir, f"diagnostics-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            await asyncio.to_thread(dump_diagnostics, diagnostics, path)
+            diagnostics_text.value += f"\n\nСохранено: {path}"
+        except Exception as ex:
+            diagnostics_text.value += f"\n\nНе удалось сохранить: {ex}"
+        page.update()
+
+    def close_db_path_dialog(e):
+        db_path_dialog.open = False
+        page.update()
+
     db_path_dialog = ft.AlertDialog(
         title=ft.Text("Путь к базе данных"),
-        content=ft.TextField(value=db_path, read_only=True, border=ft.InputBorder.NONE),
+        content=ft.Column(
+            [
+                ft.TextField(value=db_path, read_only=True, border=ft.InputBorder.NONE),
+                diagnostics_text,
+            ],
+            scroll=ft.ScrollMode.AUTO,
+            tight=True,
+        ),
+        actions=[
+            ft.TextButton("Сохранить в файл", on_click=dump_diagnostics_to_file),
+            ft.TextButton("Закрыть", on_click=close_db_path_dialog),
+        ],
         on_dismiss=lambda e: print("Диалог пути к БД закрыт"),
     )
     page.overlay.append(db_path_dialog)
 
-    def show_db_path(e):
+    async def show_db_path(e):
+        from instrumentation import format_diagnostics
+        try:
+            diagnostics.clear()
+            diagnostics.update(await page.db_manager.get_diagnostics())
+            diagnostics_text.value = format_diagnostics(diagnostics)
+        except Exception as ex:
+            diagnostics_text.value = f"Диагностика недоступна: {ex}"
         db_path_dialog.open = True
         page.update()
 
@@ -63,42 +141,43 @@ async def main(page: ft.Page):
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER # Центрируем все содержимое по горизонтали
     
     print(f"Используемый путь к БД: {db_path}")
-    page.db_manager = DatabaseManager(db_name=db_path)
-
 
     # Создаем экземпляр Updater и добавляем его на страницу как невидимый контрол
-    updater = Updater(APP_VERSION)
+    updater = Updater(APP_VERSION, download_dir=app_data_dir)
     page.add(updater)
 
     # 2. Функция для переключения экранов
     async def switch_screen(screen_widget):
+        # Экран можно передать по имени из реестра
+        if isinstance(screen_widget, str):
+            screen_widget = screens[screen_widget]
         page.controls.clear()
         page.add(screen_widget)
         # Если у экрана есть метод on_show, вызываем его
         if hasattr(screen_widget, "on_show"):
-            screen_widget.on_show()
+            result = screen_widget.on_show()
+            if inspect.isawaitable(result):
+                await result
         # Обновляем заголовок в AppBar в зависимости от экрана
         if hasattr(screen_widget, "appbar_title"):
             page.appbar.title.content = ft.Text(screen_widget.appbar_title)
         page.update()
 
-    # 3. Создаем экземпляры всех экранов
+    # 3. Реестр экранов: экраны создаются при первом переходе на них.
     # Мы передаем функцию switch_screen, чтобы экраны могли сами управлять навигацией
-    screens = {
-        "main": MainView(switch_screen),
-        "add_edit": AddEditView(switch_screen),
-        "history": HistoryView(switch_screen),
-        "settings": SettingsView(switch_screen),
-    }
-
-    # Передаем каждому экрану ссылки на другие экраны, чтобы они могли переключаться
-    screens["main"].set_screens(screens)
-    screens["add_edit"].set_screens(screens)
-    screens["history"].set_screens(screens)
-    screens["settings"].set_screens(screens)
+    screens = ScreenRegistry(switch_screen)
 
     # 4. Показываем главный экран при запуске
-    await switch_screen(screens["main"])
+    await switch_screen("main")
+    print(f"Время до первого кадра: {(time.perf_counter() - STARTUP_TIME) * 1000:.0f} мс")
+
+    # --- Отложенная работа после первого кадра ---
+    # Главный экран не обращается к базе, поэтому ее открытие и миграции
+    # начинаются уже после отрисовки. Вся работа с БД идет в отдельном потоке,
+    # экраны обращаются к ней через await.
+    page.db_manager = AsyncDatabaseManager(lambda: open_database(db_path))
+    # При каждом запуске проверяем, не остался ли скачанный APK от прошлого обновления
+    page.run_thread(remove_old_update_file, app_data_dir)
 
     # --- Запускаем проверку обновлений с небольшой задержкой ---
     # Это предотвращает "гонку состояний" при запуске на Android
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Служебные команды для обслуживания базы данных без запуска интерфейса.
+
+Примеры:
+    python manage.py rebuild-summary work_time_flet.db
+    python manage.py import work_time_flet.db timesheet.csv
+    python manage.py export work_time_flet.db history.jsonl --hours
+    python manage.py employees work_time_flet.db --add "Иванов И. И." --lunch 0.5
+    python manage.py import work_time_flet.db timesheet.csv --employee 2
+    python manage.py payroll 2024-01 2024-12 device1.db device2.db --output payroll.csv
+"""
+
+import argparse
+import sys
+
+from database_manager import DatabaseManager
+from importer import import_file
+from exporter import export_file
+from migrations import DEFAULT_EMPLOYEE_ID
+from payroll import parse_month, run_payroll, write_report
+
+
+def rebuild_summary(args):
+    """Пересчитывает monthly_summary и сообщает о месяцах, итоги которых расходились."""
+    db_manager = DatabaseManager(db_name=args.db)
+    changed = db_manager.rebuild_monthly_summary()
+    if changed:
+        print("Итоги пересчитаны. Расхождения найдены в месяцах:")
+        for employee_id, year, month in changed:
+            print(f"  {month:02d}.{year} (сотрудник {employee_id})")
+        return 1
+    print("Итоги пересчитаны, расхождений нет.")
+    return 0
+
+
+def import_entries(args):
+    """Импортирует записи из CSV/JSON и печатает итог."""
+    db_manager = DatabaseManager(db_name=args.db)
+    try:
+        result = import_file(db_manager, args.file, args.format, employee_id=args.employee)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(
+        f"Добавлено: {result['inserted']}, обновлено: {result['updated']}, "
+        f"отклонено: {result['rejected']}"
+    )
+    for number, error in result['errors']:
+        print(f"  запись {number}: {error}")
+    return 0
+
+
+def export_entries(args):
+    """Выгружает записи в CSV/JSON Lines и печатает итог."""
+    db_manager = DatabaseManager(db_name=args.db)
+    try:
+        count = export_file(
+            db_manager, args.file, args.format, start=args.start, end=args.end, with_hours=args.hours,
+            employee_id=args.employee,
+        )
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Выгружено записей: {count}")
+    return 0
+
+
+def payroll(args):
+    """Считает сводки за диапазон месяцев по нескольким базам и сохраняет общий отчет."""
+    report = run_payroll(
+        args.dbs, args.start, args.end,
+        employee_ids=args.employee, engine=args.engine, workers=args.workers,
+    )
+    write_report(report, args.output, args.format)
+    print(f"Строк в отчете: {len(report['rows'])}, баз: {len(args.dbs)}, сохранено в {args.output}")
+    for error in report['errors']:
+        print(f"  ошибка: {error}")
+    return 1 if report['errors'] else 0
+
+
+def list_employees(args):
+    """Добавляет сотрудника (с --add) и печатает список сотрудников."""
+    db_manager = DatabaseManager(db_name=args.db)
+    if args.add:
+        try:
+            employee_id = db_manager.add_employee(args.add, args.lunch)
+        except ValueError as e:
+            print(e)
+            return 1
+        print(f"Добавлен сотрудник {employee_id}: {args.add}")
+    for employee in db_manager.get_employees():
+        print(f"  {employee['id']}: {employee['name']} (обед {employee['lunch_duration_hours']:g} ч)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обслуживание базы данных Work Timer")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-summary", help="Пересчитать таблицу monthly_summary и проверить согласованность"
+    )
+    rebuild_parser.add_argument("db", help="Путь к файлу базы данных")
+    rebuild_parser.set_defaults(handler=rebuild_summary)
+
+    employees_parser = subparsers.add_parser("employees", help="Показать или добавить сотрудников")
+    employees_parser.add_argument("db", help="Путь к файлу базы данных")
+    employees_parser.add_argument("--add", metavar="NAME", help="Добавить сотрудника с этим именем")
+    employees_parser.add_argument("--lunch", type=float, default=1.0, help="Обед нового сотрудника, часы")
+    employees_parser.set_defaults(handler=list_employees)
+
+    import_parser = subparsers.add_parser("import", help="Импортировать записи из CSV или JSON")
+    import_parser.add_argument("db", help="Путь к файлу базы данных")
+    import_parser.add_argument("file", help="Файл с записями (.csv, .json или .jsonl)")
+    import_parser.add_argument(
+        "--format", choices=["csv", "json", "jsonl"], help="Формат файла, если его нельзя определить по расширению"
+    )
+    import_parser.add_argument(
+        "--employee", type=int, default=DEFAULT_EMPLOYEE_ID, help="id сотрудника, к которому относятся записи"
+    )
+    import_parser.set_defaults(handler=import_entries)
+
+    export_parser = subparsers.add_parser("export", help="Выгрузить записи в CSV или JSON Lines")
+    export_parser.add_argument("db", help="Путь к файлу базы данных")
+    export_parser.add_argument("file", help="Создаваемый файл (.csv или .jsonl)")
+    export_parser.add_argument(
+        "--format", choices=["csv", "jsonl"], help="Формат файла, если его нельзя определить по расширению"
+    )
+    export_parser.add_argument("--start", help="Начало периода, например 2024-01-01 (включительно)")
+    export_parser.add_argument("--end", help="Конец периода, например 2025-01-01 (не включительно)")
+    export_parser.add_argument("--hours", action="store_true", help="Добавить часы с обедом и без обеда")
+    export_parser.add_argument(
+        "--employee", type=int, default=DEFAULT_EMPLOYEE_ID, help="id сотрудника, чьи записи выгружаются"
+    )
+    export_parser.set_defaults(handler=export_entries)
+
+    payroll_parser = subparsers.add_parser(
+        "payroll", help="Рассчитать зарплату за диапазон месяцев по нескольким базам параллельно"
+    )
+    payroll_parser.add_argument("start", type=parse_month, help="Первый месяц, например 2024-01")
+    payroll_parser.add_argument("end", type=parse_month, help="Последний месяц включительно, например 2024-12")
+    payroll_parser.add_argument("dbs", nargs="+", help="Файлы баз данных")
+    payroll_parser.add_argument("--output", required=True, help="Файл отчета (.csv или .json)")
+    payroll_parser.add_argument(
+        "--format", choices=["csv", "json"], help="Формат отчета, если его нельзя определить по расширению"
+    )
+    payroll_parser.add_argument(
+        "--employee", type=int, action="append", help="id сотрудника (можно несколько); по умолчанию все"
+    )
+    payroll_parser.add_argument(
+        "--engine", choices=["table", "sql", "python"], default="table",
+        help="Способ агрегации: предрасчитанные итоги или пересчет по записям"
+    )
+    payroll_parser.add_argument("--workers", type=int, help="Количество процессов (по умолчанию по числу ядер)")
+    payroll_parser.set_defaults(handler=payroll)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
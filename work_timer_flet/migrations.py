@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Упорядоченный список миграций схемы базы данных.
+
+Номер примененной миграции хранится в PRAGMA user_version, поэтому
+актуальная база открывается одним чтением этой прагмы. Каждая миграция
+выполняется один раз в собственной транзакции вместе с записью нового
+номера версии: если она прервется, база останется на предыдущей версии.
+
+Базы, созданные до появления версий, имеют user_version = 0, поэтому
+миграции проверяют текущее состояние схемы и не ломаются, если их
+изменения уже были применены.
+
+Чтобы изменить схему, добавьте в конец списка новую функцию
+с декоратором @migration(<следующий номер>).
+"""
+
+MIGRATIONS = []
+
+# Сотрудник, которому принадлежат записи и настройки, созданные до появления сотрудников
+DEFAULT_EMPLOYEE_ID = 1
+DEFAULT_EMPLOYEE_NAME = "Основной сотрудник"
+
+# Схема v2: время начала и окончания - целые секунды "по часам" (см. timestamps.py),
+# duration - предрасчитанная продолжительность в секундах.
+WORK_ENTRIES_SCHEMA = """
+    CREATE TABLE {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_time INTEGER NOT NULL,
+        end_time INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        comment TEXT,
+        work_date TEXT
+    )
+"""
+
+
+def migration(version):
+    """Регистрирует функцию migrate(db_manager, cursor) как миграцию с указанным номером."""
+    def register(func):
+        expected = len(MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"Миграция {func.__name__} должна иметь номер {expected}, а не {version}")
+        MIGRATIONS.append((version, func))
+        return func
+    return register
+
+
+def latest_version():
+    """Возвращает номер последней миграции."""
+    return len(MIGRATIONS)
+
+
+def _columns(cursor, table):
+    """Возвращает словарь {имя столбца: тип} для таблицы."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row['name']: row['type'].upper() for row in cursor.fetchall()}
+
+
+def apply_migrations(db_manager):
+    """
+    Доводит схему базы до последней версии.
+    :return: список номеров примененных миграций (пустой, если база актуальна).
+    """
+    current = db_manager.conn.execute("PRAGMA user_version").fetchone()[0]
+    applied = []
+    for version, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Применяется миграция БД {version}: {migrate.__doc__.strip().splitlines()[0]}")
+        with db_manager._write_transaction() as cursor:
+            migrate(db_manager, cursor)
+            # PRAGMA не поддерживает параметры, номер версии - целое число из списка миграций
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+        applied.append(version)
+    return applied
+
+
+@migration(1)
+def create_base_schema(db_manager, cursor):
+    """Базовые таблицы записей и настроек; удаление старого столбца duration_minutes."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS work_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            comment TEXT
+        )
+    """)
+    if 'duration_minutes' in _columns(cursor, "work_entries"):
+        # Пересоздаем таблицу без duration_minutes: продолжительность считается "на лету"
+        cursor.execute("ALTER TABLE work_entries RENAME TO _work_entries_old")
+        cursor.execute("""
+            CREATE TABLE work_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                comment TEXT
+            )
+        """)
+        cursor.execute(
+            "INSERT INTO work_entries (id, start_time, end_time, comment) "
+            "SELECT id, start_time, end_time, comment FROM _work_entries_old"
+        )
+        cursor.execute("DROP TABLE _work_entries_old")
+
+    # Таблица для настроек по месяцам
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_settings (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            hourly_rate REAL DEFAULT 0.0,
+            advance REAL DEFAULT 0.0,
+            PRIMARY KEY (year, month)
+        )
+    """)
+    # Таблица для глобальных настроек
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS global_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+@migration(2)
+def add_work_date(db_manager, cursor):
+    """Ключ дня work_date с уникальным индексом вместо фильтра по date(start_time)."""
+    if 'work_date' not in _columns(cursor, "work_entries"):
+        cursor.execute("ALTER TABLE work_entries ADD COLUMN work_date TEXT")
+        cursor.execute("UPDATE work_entries SET work_date = date(start_time)")
+        # На один день допускается только одна запись. Если из-за старой логики
+        # дубликаты все же появились, оставляем самую позднюю из них.
+        cursor.execute(
+            "DELETE FROM work_entries WHERE id NOT IN (SELECT MAX(id) FROM work_entries GROUP BY work_date)"
+        )
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_work_entries_work_date ON work_entries(work_date)")
+
+
+@migration(3)
+def add_start_time_index(db_manager, cursor):
+    """Индекс по времени начала для выборок по диапазону дат."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_entries_start_time ON work_entries(start_time)")
+
+
+@migration(4)
+def convert_times_to_epoch(db_manager, cursor):
+    """Схема v2: время записей в целых секундах и столбец duration."""
+    if _columns(cursor, "work_entries").get('start_time') != 'TEXT':
+        return
+    cursor.execute("ALTER TABLE work_entries RENAME TO _work_entries_v1")
+    cursor.execute(WORK_ENTRIES_SCHEMA.format(name="work_entries"))
+    cursor.execute("""
+        INSERT INTO work_entries (id, start_time, end_time, duration, comment, work_date)
+        SELECT id, start_seconds, end_seconds, end_seconds - start_seconds, comment, work_date
+        FROM (
+            SELECT
+                id,
+                CAST(strftime('%s', start_time) AS INTEGER) AS start_seconds,
+                CAST(strftime('%s', end_time) AS INTEGER) AS end_seconds,
+                comment,
+                work_date
+            FROM _work_entries_v1
+        )
+    """)
+    # Индексы старой таблицы удаляются вместе с ней, создаем их заново
+    cursor.execute("DROP TABLE _work_entries_v1")
+    cursor.execute("CREATE UNIQUE INDEX idx_work_entries_work_date ON work_entries(work_date)")
+    cursor.execute("CREATE INDEX idx_work_entries_start_time ON work_entries(start_time)")
+
+
+@migration(5)
+def create_monthly_summary(db_manager, cursor):
+    """Таблица monthly_summary с предрасчитанными итогами по месяцам."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_summary (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            work_days_count INTEGER NOT NULL DEFAULT 0,
+            total_minutes_with_lunch REAL NOT NULL DEFAULT 0.0,
+            total_minutes_without_lunch REAL NOT NULL DEFAULT 0.0,
+            hourly_rate REAL DEFAULT 0.0,
+            advance REAL DEFAULT 0.0,
+            PRIMARY KEY (year, month)
+        )
+    """)
+    # Итоги заполняются в миграции 6, когда у записей уже есть сотрудник
+
+
+@migration(6)
+def add_employees(db_manager, cursor):
+    """Сотрудники: записи, ставки, итоги и продолжительность обеда привязываются к сотруднику."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            lunch_duration_hours REAL NOT NULL DEFAULT 1.0
+        )
+    """)
+    # Продолжительность обеда из глобальных настроек становится настройкой сотрудника по умолчанию
+    cursor.execute("SELECT value FROM global_settings WHERE key = 'lunch_duration_hours'")
+    row = cursor.fetchone()
+    cursor.execute(
+        "INSERT OR IGNORE INTO employees (id, name, lunch_duration_hours) VALUES (?, ?, ?)",
+        (DEFAULT_EMPLOYEE_ID, DEFAULT_EMPLOYEE_NAME, float(row['value']) if row else 1.0)
+    )
+    cursor.execute("DELETE FROM global_settings WHERE key = 'lunch_duration_hours'")
+
+    if 'employee_id' not in _columns(cursor, "work_entries"):
+        # Значение по умолчанию сразу относит все существующие записи к основному сотруднику
+        cursor.execute(
+            f"ALTER TABLE work_entries ADD COLUMN employee_id INTEGER NOT NULL DEFAULT {int(DEFAULT_EMPLOYEE_ID)}"
+        )
+    # Один день уникален в пределах сотрудника. Индекс по времени начала покрывающий:
+    # выборки времени и итоги месяца одного сотрудника читают только индекс.
+    cursor.execute("DROP INDEX IF EXISTS idx_work_entries_work_date")
+    cursor.execute("DROP INDEX IF EXISTS idx_work_entries_start_time")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_work_entries_employee_date ON work_entries(employee_id, work_date)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_work_entries_employee_start "
+        "ON work_entries(employee_id, start_time, end_time, duration)"
+    )
+
+    if 'employee_id' not in _columns(cursor, "monthly_settings"):
+        # Первичный ключ меняется, поэтому таблицу настроек пересоздаем
+        cursor.execute("ALTER TABLE monthly_settings RENAME TO _monthly_settings_v1")
+        cursor.execute("""
+            CREATE TABLE monthly_settings (
+                employee_id INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                hourly_rate REAL DEFAULT 0.0,
+                advance REAL DEFAULT 0.0,
+                PRIMARY KEY (employee_id, year, month)
+            )
+        """)
+        cursor.execute(
+            "INSERT INTO monthly_settings (employee_id, year, month, hourly_rate, advance) "
+            "SELECT ?, year, month, hourly_rate, advance FROM _monthly_settings_v1",
+            (DEFAULT_EMPLOYEE_ID,)
+        )
+        cursor.execute("DROP TABLE _monthly_settings_v1")
+
+    # Итоги - производные данные: пересоздаем таблицу и считаем заново
+    cursor.execute("DROP TABLE IF EXISTS monthly_summary")
+    cursor.execute("""
+        CREATE TABLE monthly_summary (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            work_days_count INTEGER NOT NULL DEFAULT 0,
+            total_minutes_with_lunch REAL NOT NULL DEFAULT 0.0,
+            total_minutes_without_lunch REAL NOT NULL DEFAULT 0.0,
+            hourly_rate REAL DEFAULT 0.0,
+            advance REAL DEFAULT 0.0,
+            PRIMARY KEY (employee_id, year, month)
+        )
+    """)
+    db_manager._rebuild_monthly_summary(cursor)
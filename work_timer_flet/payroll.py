@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Пакетный расчет зарплаты без интерфейса.
+
+Для каждой базы данных (например, по одной на устройство или сотрудника)
+сводки за диапазон месяцев считаются теми же правилами, что и в истории
+(calculator.calculate_monthly_summary), для всех или выбранных сотрудников.
+Базы обрабатываются параллельно в пуле процессов: у каждого процесса свои
+соединения SQLite и свой интерпретатор, поэтому расчет масштабируется по ядрам.
+Результат сводится в один отчет CSV или JSON.
+
+Исходные базы открываются только для чтения и никогда не изменяются. Базу
+со схемой старой версии (например, с устройства, где приложение еще не
+обновлено) сначала копируют во временный файл, и миграции применяются к копии.
+
+Запуск - через manage.py:
+    python manage.py payroll 2024-01 2024-12 device1.db device2.db --output payroll.csv
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from calculator import calculate_monthly_summary
+from database_manager import DatabaseManager
+from migrations import latest_version
+
+SUMMARY_FIELDS = [
+    "work_days_count", "total_hours_with_lunch", "total_hours_without_lunch",
+    "gross_pay", "tax_amount", "net_pay", "advance", "final_payout",
+]
+FIELDS = ["db", "employee_id", "employee", "year", "month"] + SUMMARY_FIELDS
+
+
+def parse_month(value):
+    """Разбирает месяц вида "ГГГГ-ММ" в кортеж (год, месяц)."""
+    year, _, month = value.partition("-")
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Некорректный месяц: {value}")
+    return year, month
+
+
+def iter_months(start_month, end_month):
+    """Перебирает месяцы (год, месяц) от start_month до end_month включительно."""
+    for index in range(start_month[0] * 12 + start_month[1] - 1, end_month[0] * 12 + end_month[1]):
+        year, month_index = divmod(index, 12)
+        yield year, month_index + 1
+
+
+def open_for_report(db_path, tmp_dir):
+    """
+    Открывает базу для отчета, не изменяя исходный файл.
+    Актуальная база открывается только для чтения; база старой версии копируется
+    в tmp_dir, и миграции применяются к копии.
+    :raises ValueError: если схема базы новее, чем известна этой версии приложения.
+    """
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        version = source.execute("PRAGMA user_version").fetchone()[0]
+        if version > latest_version():
+            raise ValueError(f"версия схемы {version} новее поддерживаемой ({latest_version()})")
+        if version < latest_version():
+            copy_path = os.path.join(tmp_dir, "report_copy.db")
+            target = sqlite3.connect(copy_path)
+            try:
+                source.backup(target) # Копия включает и данные из файла WAL
+            finally:
+                target.close()
+            return DatabaseManager(db_name=copy_path)
+    finally:
+        source.close()
+    return DatabaseManager(db_name=db_path, read_only=True)
+
+
+def summarize_database(db_path, start_month, end_month, employee_ids=None, engine="table"):
+    """
+    Считает сводки одной базы за диапазон месяцев. Выполняется в процессе пула.
+
+    :param employee_ids: id сотрудников; None - все сотрудники базы.
+    :param engine: способ агрегации, как у calculate_monthly_summary.
+    :return: словарь {'rows': [...], 'error': текст ошибки или None};
+             строки - по одной на сотрудника и месяц, с полями FIELDS.
+    """
+    if not os.path.exists(db_path):
+        # Опечатка в пути должна быть видна в отчете
+        return {'rows': [], 'error': f"{db_path}: файл не найден"}
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rows = _summarize_rows(db_path, tmp_dir, start_month, end_month, employee_ids, engine)
+    except Exception as e:
+        # Одна поврежденная база не должна останавливать расчет остальных
+        return {'rows': [], 'error': f"{db_path}: {e}"}
+    return {'rows': rows, 'error': None}
+
+
+def _summarize_rows(db_path, tmp_dir, start_month, end_month, employee_ids, engine):
+    """Строки отчета одной базы: по одной на сотрудника и месяц."""
+    rows = []
+    db_manager = open_for_report(db_path, tmp_dir)
+    try:
+        employees = {employee['id']: employee['name'] for employee in db_manager.get_employees()}
+        for employee_id in (employee_ids if employee_ids is not None else employees):
+            if employee_id not in employees:
+                continue # Сотрудника нет в этой базе
+            for year, month in iter_months(start_month, end_month):
+                summary = calculate_monthly_summary(db_manager, year, month, engine, employee_id=employee_id)
+                rows.append({
+                    "db": db_path,
+                    "employee_id": employee_id,
+                    "employee": employees[employee_id],
+                    "year": year,
+                    "month": month,
+                    **{field: summary[field] for field in SUMMARY_FIELDS},
+                })
+    finally:
+        db_manager.close()
+    return rows
+
+
+def _summarize(task):
+    """Распаковывает задание для ProcessPoolExecutor.map."""
+    return summarize_database(*task)
+
+
+def run_payroll(db_paths, start_month, end_month, employee_ids=None, engine="table", workers=None):
+    """
+    Считает сводки для нескольких баз параллельно.
+
+    :param db_paths: пути к файлам баз данных.
+    :param workers: количество процессов; None - по числу ядер, 1 - в текущем процессе без пула.
+    :return: словарь {'rows': [...], 'errors': [...]}; строки идут в порядке db_paths.
+    """
+    tasks = [(path, start_month, end_month, employee_ids, engine) for path in db_paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return _merge(map(_summarize, tasks))
+    workers = min(workers, len(tasks))
+    # Базы раздаются пачками, чтобы на сотнях маленьких баз пересылка заданий не стала узким местом
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _merge(executor.map(_summarize, tasks, chunksize=chunksize))
+
+
+def _merge(results):
+    """Сводит результаты отдельных баз в один отчет."""
+    report = {'rows': [], 'errors': []}
+    for result in results:
+        report['rows'].extend(result['rows'])
+        if result['error']:
+            report['errors'].append(result['error'])
+    return report
+
+
+def write_report(report, path, file_format=None):
+    """
+    Сохраняет отчет в CSV (только строки) или JSON (строки и ошибки).
+    :param file_format: "csv" или "json"; по умолчанию определяется по расширению.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format not in ("csv", "json"):
+        raise ValueError(f"Неподдерживаемый формат файла: {file_format}")
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(report['rows'])
+        else:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    return path
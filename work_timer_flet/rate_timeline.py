@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+def period_key(year, month):
+    """Возвращает ключ периода вида ГГГГММ для сравнения месяцев."""
+    return year * 100 + month
+
+
+def month_bounds(year, month):
+    """
+    Возвращает полуинтервал [начало месяца, начало следующего месяца)
+    в виде пары объектов datetime.date.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+class RateTimeline:
+    """
+    Хронология настроек по месяцам, загружаемая из monthly_settings один раз.
+
+    Ставка наследуется с последнего месяца, в котором она была задана, аванс - нет.
+    Поиск эффективной ставки выполняется бинарным поиском по отсортированному
+    списку ключей периодов, без обращения к базе данных.
+
+    Хронологию читают без блокировок из нескольких потоков, поэтому set() не меняет
+    списки на месте, а подменяет пару (ключи, ставки) целиком одним присваиванием.
+    """
+    def __init__(self, rows=()):
+        """
+        :param rows: строки с полями year, month, hourly_rate, advance
+                     (например, результат запроса к monthly_settings).
+        """
+        keys = []          # Отсортированные ключи периодов ГГГГММ
+        rates = []         # Ставки, параллельно списку keys
+        self.advances = {} # Аванс по ключу периода
+        for row in sorted(rows, key=lambda r: period_key(r['year'], r['month'])):
+            key = period_key(row['year'], row['month'])
+            keys.append(key)
+            rates.append(float(row['hourly_rate'] or 0.0))
+            self.advances[key] = float(row['advance'] or 0.0)
+        self.periods = (keys, rates)
+
+    def set(self, year, month, hourly_rate, advance):
+        """Добавляет или обновляет настройки месяца, сохраняя порядок ключей."""
+        key = period_key(year, month)
+        keys, rates = list(self.periods[0]), list(self.periods[1])
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            rates[index] = float(hourly_rate)
+        else:
+            keys.insert(index, key)
+            rates.insert(index, float(hourly_rate))
+        self.advances[key] = float(advance)
+        self.periods = (keys, rates)
+
+    def rate_for(self, year, month):
+        """Возвращает ставку, действующую в указанном месяце (последнюю заданную до него включительно)."""
+        keys, rates = self.periods
+        index = bisect_right(keys, period_key(year, month)) - 1
+        return rates[index] if index >= 0 else 0.0
+
+    def next_key_after(self, year, month):
+        """Возвращает ключ ближайшего следующего месяца с заданными настройками или None."""
+        keys = self.periods[0]
+        index = bisect_right(keys, period_key(year, month))
+        return keys[index] if index < len(keys) else None
+
+    def advance_for(self, year, month):
+        """Возвращает аванс, заданный именно для указанного месяца."""
+        return self.advances.get(period_key(year, month), 0.0)
+
+    def settings_for(self, year, month):
+        """Возвращает настройки месяца в том же виде, что и DatabaseManager.get_settings_for_month."""
+        return {"hourly_rate": self.rate_for(year, month), "advance": self.advance_for(year, month)}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+from rate_timeline import period_key
+
+
+class MonthCache:
+    """
+    Ограниченный по размеру LRU-кэш результатов, привязанных к месяцу.
+
+    Ключ - кортеж вида (вид результата, год, месяц, ...). Это позволяет точно
+    сбрасывать только те результаты, на которые повлияла запись в базу:
+    один месяц, все месяцы начиная с указанного или весь кэш.
+
+    Кэш можно использовать из нескольких потоков; значение вычисляется
+    вне блокировки, поэтому долгий расчет не задерживает других.
+    """
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.generation = 0 # Увеличивается при каждом сбросе
+
+    def get_or_compute(self, key, compute):
+        """Возвращает значение из кэша или вычисляет его функцией compute() и запоминает."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            generation = self.generation
+        value = compute()
+        with self.lock:
+            # Если пока мы считали, кэш сбрасывали, результат мог устареть - не сохраняем его
+            if generation == self.generation:
+                self.entries[key] = value
+                if len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False) # Вытесняем давно не использованный результат
+        return value
+
+    def invalidate_month(self, year, month):
+        """Сбрасывает результаты одного месяца."""
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.entries if key[1:3] == (year, month)]:
+                del self.entries[key]
+
+    def invalidate_from(self, year, month):
+        """Сбрасывает результаты указанного месяца и всех последующих."""
+        start_key = period_key(year, month)
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.entries if period_key(key[1], key[2]) >= start_key]:
+                del self.entries[key]
+
+    def clear(self):
+        """Сбрасывает все результаты."""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        """Возвращает счетчики попаданий и промахов."""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
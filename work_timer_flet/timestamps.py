@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Преобразование времени записей в целые секунды и обратно.
+
+Время хранится "по часам": секунды от 1970-01-01 00:00 без учета часового
+пояса, так же как его видит пользователь. Поэтому переходы на летнее время
+не искажают продолжительность смены, а дата записи - это просто start_time // 86400.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def to_epoch(value):
+    """
+    Переводит время в целые секунды.
+    :param value: datetime, date (полночь этого дня), ISO-строка или уже готовое число секунд.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime) and isinstance(value, date):
+        value = datetime.combine(value, time())
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(seconds):
+    """Переводит целые секунды обратно в datetime (без часового пояса)."""
+    return EPOCH + timedelta(seconds=seconds)
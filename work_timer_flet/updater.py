@@ -1,39 +1,250 @@
 import flet as ft
-import requests
-from packaging.version import parse as parse_version
 import asyncio
+import hashlib
+import json
 import os
+import re
+import threading
+import time
 
 # URL для проверки версии и получения прямой ссылки на APK
 VERSION_URL = "https://raw.githubusercontent.com/dmitrimailov/worktime/main/version.json"
+REQUEST_TIMEOUT = 10 # секунд
+
+# Проверять обновления не чаще, чем раз в столько часов
+# (переопределяется глобальной настройкой update_check_interval_hours)
+UPDATE_CHECK_INTERVAL_HOURS = 12
+# После неудачной проверки следующая откладывается на 5 минут, затем 10, 20... но не больше суток
+FAILURE_BACKOFF_SECONDS = 5 * 60
+MAX_FAILURE_BACKOFF_SECONDS = 24 * 3600
+# Загрузка APK внутри приложения
+APK_FILE_NAME = "update.apk"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PROGRESS_UPDATE_SECONDS = 0.25 # Как часто обновлять индикатор загрузки
+# Ключи global_settings, в которых хранится состояние проверки обновлений
+UPDATE_STATE_KEYS = [
+    "update_etag",
+    "update_last_modified",
+    "update_last_check",
+    "update_payload",
+    "update_failures",
+    "update_check_interval_hours",
+]
+
+
+def parse_version(version):
+    """
+    Превращает строку версии вида "1.0.12" в кортеж чисел для сравнения.
+    Суффиксы вроде "-beta" или "rc1" у компонента отбрасываются,
+    недостающие компоненты считаются нулями: "1.1" == "1.1.0".
+    """
+    parts = []
+    for part in str(version).strip().lstrip("vV").split("."):
+        match = re.match(r"\d+", part)
+        parts.append(int(match.group()) if match else 0)
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def fetch_json(url, headers=None, timeout=REQUEST_TIMEOUT):
+    """
+    Синхронно загружает и разбирает JSON по URL (вызывается в пуле потоков).
+    :param headers: дополнительные заголовки запроса, например условные
+                    If-None-Match и If-Modified-Since.
+    :return: кортеж (данные или None, если сервер ответил 304 Not Modified; заголовки ответа).
+    """
+    # urllib.request тянет за собой http.client и ssl, поэтому импортируем
+    # его только при проверке обновлений, а не при запуске приложения
+    import urllib.error
+    import urllib.request
+
+    request = urllib.request.Request(url, headers={"Accept": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8")), response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, e.headers
+        raise
+
+
+def check_version_info(state, url=VERSION_URL, now=None):
+    """
+    Возвращает содержимое version.json, по возможности не обращаясь к сети.
+
+    Пока с последней проверки не прошел интервал, используется сохраненный ответ.
+    Иначе отправляется условный запрос с сохраненными ETag и Last-Modified,
+    и при ответе 304 сохраненный ответ считается актуальным. После неудачных
+    попыток следующая откладывается на все больший срок.
+
+    :param state: сохраненное состояние - словарь с ключами UPDATE_STATE_KEYS
+                  (значения - строки из global_settings или None).
+    :param now: текущее время в секундах (time.time()), для проверок.
+    :return: кортеж (данные version.json или None; словарь настроек, которые нужно сохранить).
+    """
+    now = time.time() if now is None else now
+    last_check = float(state.get("update_last_check") or 0)
+    failures = int(state.get("update_failures") or 0)
+    interval_hours = float(state.get("update_check_interval_hours") or UPDATE_CHECK_INTERVAL_HOURS)
+    cached = json.loads(state["update_payload"]) if state.get("update_payload") else None
+
+    if failures:
+        delay = min(FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1), MAX_FAILURE_BACKOFF_SECONDS)
+    else:
+        delay = interval_hours * 3600
+    # Если часы перевели назад, интервал не ждем
+    if state.get("update_last_check") and last_check <= now < last_check + delay:
+        return cached, {}
+
+    headers = {}
+    # Условный запрос имеет смысл, только если есть сохраненный ответ
+    if cached is not None:
+        if state.get("update_etag"):
+            headers["If-None-Match"] = state["update_etag"]
+        if state.get("update_last_modified"):
+            headers["If-Modified-Since"] = state["update_last_modified"]
+
+    try:
+        remote_data, response_headers = fetch_json(url, headers)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось получить {url}: {e}")
+        return cached, {"update_last_check": now, "update_failures": failures + 1}
+
+    if remote_data is None:
+        print("version.json не изменился с прошлой проверки")
+        return cached, {"update_last_check": now, "update_failures": 0}
+    return remote_data, {
+        "update_etag": response_headers.get("ETag") or "",
+        "update_last_modified": response_headers.get("Last-Modified") or "",
+        "update_payload": json.dumps(remote_data, ensure_ascii=False),
+        "update_last_check": now,
+        "update_failures": 0,
+    }
+
+
+def _response_total(response, offset):
+    """Полный размер файла по заголовкам ответа (None, если сервер его не сообщил)."""
+    content_range = response.headers.get("Content-Range")
+    if response.status == 206 and content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def download_file(url, path, expected_sha256, progress=None, cancel_event=None,
+                  chunk_size=DOWNLOAD_CHUNK_SIZE, timeout=REQUEST_TIMEOUT):
+    """
+    Скачивает файл по частям с докачкой и проверкой SHA-256 (вызывается в пуле потоков).
+
+    Данные пишутся в path + ".part". Если такой файл остался от прерванной
+    загрузки, запрашивается только недостающая часть (HTTP Range). Готовый файл
+    переименовывается в path только после совпадения контрольной суммы.
+
+    :param progress: функция progress(скачано байт, всего байт или None).
+    :param cancel_event: threading.Event; если он установлен, загрузка останавливается,
+                         а частичный файл остается для докачки.
+    :return: path, или None, если загрузка отменена.
+    :raises ValueError: если контрольная сумма не совпала (частичный файл удаляется).
+    """
+    import urllib.error
+    import urllib.request
+
+    part_path = path + ".part"
+    expected_sha256 = expected_sha256.strip().lower()
+    while True:
+        hasher = hashlib.sha256()
+        downloaded = 0
+        # Контрольная сумма считается по всему файлу, поэтому учитываем уже скачанную часть
+        if os.path.exists(part_path):
+            with open(part_path, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    hasher.update(chunk)
+                    downloaded += len(chunk)
+        resumed_from = downloaded
+
+        request = urllib.request.Request(url, headers={"Range": f"bytes={downloaded}-"} if downloaded else {})
+        try:
+            response = urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            # 416 - запрошенный диапазон пуст: частичный файл уже скачан целиком
+            if e.code != 416 or not downloaded:
+                raise
+            response = None
+
+        if response is not None:
+            with response:
+                if downloaded and response.status != 206:
+                    # Сервер не поддерживает Range и прислал файл целиком - начинаем сначала
+                    hasher = hashlib.sha256()
+                    downloaded = resumed_from = 0
+                total = _response_total(response, downloaded)
+                with open(part_path, "ab" if downloaded else "wb") as file:
+                    while True:
+                        if cancel_event is not None and cancel_event.is_set():
+                            return None
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            break
+                        file.write(chunk)
+                        hasher.update(chunk)
+                        downloaded += len(chunk)
+                        if progress is not None:
+                            progress(downloaded, total)
+                if total is not None and downloaded < total:
+                    # Частичный файл остается для докачки
+                    raise ConnectionError(f"Соединение прервано: получено {downloaded} из {total} байт")
+
+        if hasher.hexdigest() == expected_sha256:
+            os.replace(part_path, path)
+            return path
+        os.remove(part_path)
+        if not resumed_from:
+            raise ValueError("Контрольная сумма скачанного файла не совпадает с опубликованной")
+        # Частичный файл мог остаться от другой версии - один раз скачиваем заново целиком
+        print("Контрольная сумма после докачки не совпала, файл скачивается заново")
+
 
 @ft.control("updater")
 class Updater(ft.Control):
-    def __init__(self, current_version: str):
+    def __init__(self, current_version: str, download_dir: str = "."):
         super().__init__()
         self.current_version = current_version
+        # APK скачивается в папку данных приложения
+        self.apk_path = os.path.join(download_dir, APK_FILE_NAME)
         # Атрибуты для хранения состояния обновления
         self.release_page_url = None
         self.apk_direct_url = None # Прямая ссылка на APK
+        self.apk_sha256 = None # Контрольная сумма APK из version.json
         self.update_dialog = None
+        self.cancel_download = None
+        self.progress_bar = None
+        self.progress_text = None
 
     def build(self):
         # Этот контрол невидимый, поэтому возвращаем пустой контейнер
         return ft.Container()
 
     async def check_for_updates(self):
-        """Асинхронно проверяет обновления и показывает диалог."""
+        """
+        Асинхронно проверяет обновления и показывает диалог.
+        Сеть используется не чаще интервала проверки (см. check_version_info),
+        состояние проверки хранится в global_settings.
+        """
         try:
-            loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(
-                None, lambda: requests.get(VERSION_URL, timeout=10)
-            )
-            response.raise_for_status()
-            remote_data = response.json()
+            db = self.page.db_manager
+            state = await db.get_global_settings(UPDATE_STATE_KEYS)
+            remote_data, new_state = await asyncio.to_thread(check_version_info, state)
+            if new_state:
+                await db.set_global_settings(new_state)
+            if not remote_data:
+                return
             remote_version_str = remote_data.get("version")
             # Сохраняем обе ссылки: на страницу релиза и прямую на APK
             self.release_page_url = remote_data.get("url") 
             self.apk_direct_url = remote_data.get("apk_url")
+            self.apk_sha256 = remote_data.get("sha256")
 
             if not remote_version_str or not self.apk_direct_url:
                 print("Ошибка в файле version.json: отсутствует 'version' или 'apk_url'")
@@ -70,8 +281,110 @@ class Updater(ft.Control):
             self.page.update()
     
     async def handle_open_download_url(self, e):
-        """Обработчик для кнопки 'Загрузить'. Открывает прямую ссылку на APK."""
-        if self.apk_direct_url:
-            await self.page.launch_url(self.apk_direct_url)
-            # Сразу закрываем диалог, так как дальнейшие действия происходят в браузере
-            self.handle_close_dialog(None)
+        """
+        Обработчик для кнопки 'Загрузить'. Если в version.json опубликована
+        контрольная сумма, APK скачивается внутри приложения, иначе
+        прямая ссылка открывается в браузере.
+        """
+        if not self.apk_direct_url:
+            return
+        if self.apk_sha256:
+            self.page.run_task(self.download_update)
+            return
+        await self.page.launch_url(self.apk_direct_url)
+        # Сразу закрываем диалог, так как дальнейшие действия происходят в браузере
+        self.handle_close_dialog(None)
+
+    def _show_dialog_state(self, content, actions):
+        """Меняет содержимое и кнопки диалога обновления."""
+        self.update_dialog.content = content
+        self.update_dialog.actions = actions
+        self.update_dialog.open = True
+        self.page.update()
+
+    def _show_progress(self, downloaded, total):
+        """Обновляет индикатор загрузки (вызывается в цикле событий)."""
+        megabytes = downloaded / (1024 * 1024)
+        if total:
+            self.progress_bar.value = downloaded / total
+            self.progress_text.value = f"{megabytes:.1f} из {total / (1024 * 1024):.1f} МБ"
+        else:
+            self.progress_text.value = f"{megabytes:.1f} МБ"
+        self.page.update()
+
+    async def download_update(self):
+        """Фоновая задача: скачивает APK, проверяет контрольную сумму и предлагает установку."""
+        loop = asyncio.get_running_loop()
+        self.cancel_download = threading.Event()
+        self.progress_bar = ft.ProgressBar(value=None, width=300)
+        self.progress_text = ft.Text("Подключение...")
+        self._show_dialog_state(
+            ft.Column([self.progress_text, self.progress_bar], tight=True),
+            [ft.TextButton("Отмена", on_click=self.handle_cancel_download)],
+        )
+
+        last_shown = 0.0
+
+        def progress(downloaded, total):
+            # Вызывается из потока загрузки; обновляем интерфейс не чаще PROGRESS_UPDATE_SECONDS
+            nonlocal last_shown
+            now = time.monotonic()
+            if now - last_shown >= PROGRESS_UPDATE_SECONDS or downloaded == total:
+                last_shown = now
+                loop.call_soon_threadsafe(self._show_progress, downloaded, total)
+
+        try:
+            path = await asyncio.to_thread(
+                download_file, self.apk_direct_url, self.apk_path, self.apk_sha256,
+                progress, self.cancel_download,
+            )
+        except Exception as e:
+            print(f"Ошибка при загрузке обновления: {e}")
+            # Частичный файл остается, повторная попытка продолжит загрузку с того же места
+            self._show_dialog_state(
+                ft.Text(f"Не удалось загрузить обновление:\n{e}"),
+                [
+                    ft.FilledButton("Повторить", on_click=self.handle_open_download_url),
+                    ft.TextButton("Позже", on_click=self.handle_close_dialog),
+                ],
+            )
+            return
+
+        if path is None:
+            print("Загрузка обновления отменена")
+            return
+        print(f"Обновление загружено и проверено: {path}")
+        self._show_dialog_state(
+            ft.Text(
+                "Обновление загружено, контрольная сумма совпадает.\n\n"
+                "Приложение не может само запустить установку. Нажмите «Поделиться» и выберите "
+                "файловый менеджер или установщик пакетов. Если их нет в списке, "
+                "скачайте APK в браузере и откройте его из загрузок."
+            ),
+            [
+                ft.FilledButton("Поделиться", on_click=self.handle_share_apk),
+                ft.TextButton("В браузере", on_click=self.handle_open_in_browser),
+                ft.TextButton("Позже", on_click=self.handle_close_dialog),
+            ],
+        )
+
+    def handle_cancel_download(self, e):
+        """Обработчик для кнопки 'Отмена' во время загрузки."""
+        if self.cancel_download is not None:
+            self.cancel_download.set()
+        self.handle_close_dialog(e)
+
+    async def handle_share_apk(self, e):
+        """
+        Обработчик для кнопки 'Поделиться'. Передает проверенный APK через диалог
+        "Поделиться" (ACTION_SEND). Это не запуск установки: у Flet нет способа
+        отправить ACTION_VIEW с content:// URI, поэтому установку выполняет
+        приложение, которое выберет пользователь (файловый менеджер и т.п.).
+        """
+        self.handle_close_dialog(e)
+        await ft.Share().share_files([ft.ShareFile.from_path(self.apk_path)])
+
+    async def handle_open_in_browser(self, e):
+        """Обработчик для кнопки 'В браузере': скачанный браузером APK устанавливается из загрузок."""
+        self.handle_close_dialog(e)
+        await self.page.launch_url(self.apk_direct_url)
@@ -1,5 +1,7 @@
 import flet as ft
 from datetime import datetime
+from timestamps import from_epoch
+from views.employee_selector import EmployeeDropdown, current_employee_id
 
 class AddEditView(ft.Column):
     def __init__(self, switch_screen_func):
@@ -27,6 +29,9 @@ class AddEditView(ft.Column):
         )
 
         # --- Создаем поля формы ---
+        # При смене сотрудника форма показывает его запись за выбранную дату
+        self.employee_dropdown = EmployeeDropdown(on_employee_change=self.on_employee_change, width=300)
+
         # Вместо TextField используем Text внутри Container, чтобы надежно ловить клики
         self.start_time_text = ft.Text("09:00", size=16)
         self.start_time_container = ft.Container(
@@ -67,6 +72,7 @@ class AddEditView(ft.Column):
         # --- Создаем контейнер для формы, который будет скрыт по умолчанию ---
         self.form_container = ft.Column(
             [
+                self.employee_dropdown,
                 ft.Row(
                     [self.start_time_container, self.end_time_container],
                     alignment=ft.MainAxisAlignment.CENTER,
@@ -97,9 +103,10 @@ class AddEditView(ft.Column):
         # Добавляем пикеры в оверлей страницы при сборке
         self.page.overlay.extend([self.date_picker, self.start_time_picker, self.end_time_picker])
 
-    def on_show(self):
+    async def on_show(self):
         """Вызывается при показе экрана. Открывает календарь."""
         # Сбрасываем состояние при каждом входе на экран
+        await self.employee_dropdown.load()
         self.selected_date = None
         self.form_container.visible = False
         # Добавляем пикеры в оверлей, если их там еще нет
@@ -114,22 +121,29 @@ class AddEditView(ft.Column):
         self.date_picker.open = True
         self.page.update()
 
-    def date_picked(self, e):
+    async def date_picked(self, e):
         """Обработчик выбора даты в календаре."""
         # Явно конвертируем время из UTC в локальное время системы
         utc_date = self.date_picker.value
         local_date = utc_date.astimezone()
         self.selected_date = local_date.date()
         self.page.appbar.title = ft.Text(f"Запись за {self.selected_date.strftime('%d.%m.%Y')}")
+        await self.load_entry()
+
+    async def on_employee_change(self, e):
+        """Вызывается при выборе другого сотрудника."""
+        if self.selected_date:
+            await self.load_entry()
 
-        # Загружаем данные для выбранной даты
+    async def load_entry(self):
+        """Загружает в форму запись выбранного сотрудника за выбранную дату."""
         db_manager = self.page.db_manager
-        entry = db_manager.get_entry_by_date(self.selected_date)
+        entry = await db_manager.get_entry_by_date(self.selected_date, employee_id=current_employee_id(self.page))
 
         if entry:
             # Запись найдена, загружаем данные из нее
-            start_dt = datetime.fromisoformat(entry['start_time'])
-            end_dt = datetime.fromisoformat(entry['end_time'])
+            start_dt = from_epoch(entry['start_time'])
+            end_dt = from_epoch(entry['end_time'])
             self.start_time_text.value = start_dt.strftime("%H:%M")
             self.end_time_text.value = end_dt.strftime("%H:%M")
             self.comment_field.value = entry['comment'] if entry['comment'] else ""
@@ -182,10 +196,11 @@ class AddEditView(ft.Column):
             start_str = f"{self.selected_date.isoformat()} {self.start_time_text.value}:00"
             end_str = f"{self.selected_date.isoformat()} {self.end_time_text.value}:00"
 
-            db_manager.add_or_update_entry(
+            await db_manager.add_or_update_entry(
                 start_time_str=start_str,
                 end_time_str=end_str,
-                comment=self.comment_field.value
+                comment=self.comment_field.value,
+                employee_id=current_employee_id(self.page),
             )
             await self.go_to_main(e)
         except Exception as ex:
@@ -199,7 +214,7 @@ class AddEditView(ft.Column):
         """Обработчик удаления записи."""
         if self.selected_date:
             db_manager = self.page.db_manager
-            db_manager.delete_entry_by_date(self.selected_date)
+            await db_manager.delete_entry_by_date(self.selected_date, employee_id=current_employee_id(self.page))
             
             # Возвращаемся на главный экран и показываем уведомление
             await self.go_to_main(e)
@@ -0,0 +1,32 @@
+import flet as ft
+from migrations import DEFAULT_EMPLOYEE_ID
+
+
+def current_employee_id(page):
+    """Возвращает сотрудника, выбранного в интерфейсе. Выбор общий для всех экранов."""
+    return getattr(page, "employee_id", DEFAULT_EMPLOYEE_ID)
+
+
+class EmployeeDropdown(ft.Dropdown):
+    """
+    Выпадающий список сотрудников. Выбранный сотрудник запоминается на странице
+    (page.employee_id), поэтому при переходе между экранами он сохраняется.
+    Пока сотрудник один, список скрыт.
+    """
+    def __init__(self, on_employee_change=None, width=290):
+        super().__init__(label="Сотрудник", width=width, visible=False)
+        self.on_employee_change = on_employee_change
+        self.on_select = self.employee_selected
+
+    async def load(self):
+        """Заполняет список сотрудниками из базы и отмечает выбранного."""
+        employees = await self.page.db_manager.get_employees()
+        self.options = [ft.dropdown.Option(str(employee['id']), text=employee['name']) for employee in employees]
+        self.value = str(current_employee_id(self.page))
+        self.visible = len(employees) > 1
+
+    async def employee_selected(self, e):
+        """Запоминает выбранного сотрудника и сообщает экрану."""
+        self.page.employee_id = int(self.value)
+        if self.on_employee_change is not None:
+            await self.on_employee_change(e)
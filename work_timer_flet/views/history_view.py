@@ -1,6 +1,26 @@
 import flet as ft
-from datetime import datetime
-from calculator import calculate_monthly_summary
+import asyncio
+from datetime import date, datetime
+from calculator import build_month_report, build_history_page, calculate_range_summary
+from views.employee_selector import EmployeeDropdown, current_employee_id
+
+DAYS_MAP = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+# Просмотр за длинный период: высота строки фиксирована, чтобы список
+# строил строки только по мере прокрутки, а данные читаются страницами
+RANGE_ROW_HEIGHT = 40
+RANGE_PAGE_SIZE = 100
+# Следующая страница загружается, когда до конца списка остается меньше этого числа строк
+RANGE_PREFETCH_ROWS = 30
+RANGE_COLUMN_WIDTHS = [90, 40, 60, 60, 60]
+# Если год или месяц меняют чаще, чем раз в столько секунд, отчет строится только для последнего выбора
+SELECTION_DEBOUNCE_SECONDS = 0.15
+
+
+def _shift_month(year, month, delta):
+    """Возвращает (год, месяц), отстоящий от указанного на delta месяцев."""
+    year, month_index = divmod(year * 12 + month - 1 + delta, 12)
+    return year, month_index + 1
+
 
 class HistoryView(ft.Column):
     def __init__(self, switch_screen_func):
@@ -23,7 +43,7 @@ class HistoryView(ft.Column):
             options=[ft.dropdown.Option(str(y)) for y in range(current_year - 2, current_year + 3)],
             value=str(current_year),
         )
-        self.year_dropdown.on_change = self.on_date_part_change
+        self.year_dropdown.on_select = self.on_date_part_change
 
         self.month_dropdown = ft.Dropdown(
             label="Месяц",
@@ -31,7 +51,23 @@ class HistoryView(ft.Column):
             options=[ft.dropdown.Option(str(m), text=f"{m:02d}") for m in range(1, 13)],
             value=str(current_month),
         )
-        self.month_dropdown.on_change = self.on_date_part_change
+        self.month_dropdown.on_select = self.on_date_part_change
+
+        # Период отчета: месяц - таблица со сводкой, год или все время - прокручиваемый список
+        self.period_dropdown = ft.Dropdown(
+            label="Период",
+            width=290,
+            options=[
+                ft.dropdown.Option("month", text="Месяц"),
+                ft.dropdown.Option("year", text="Год"),
+                ft.dropdown.Option("all", text="Все время"),
+            ],
+            value="month",
+        )
+        self.period_dropdown.on_select = self.on_period_change
+
+        # Сотрудник, чья история показывается
+        self.employee_dropdown = EmployeeDropdown()
 
         # Таблица для отображения записей
         self.entries_table = ft.DataTable(
@@ -46,6 +82,29 @@ class HistoryView(ft.Column):
             rows=[],
         )
 
+        # Список для длинных периодов: строки добавляются страницами при прокрутке
+        self.range_list = ft.ListView(
+            item_extent=RANGE_ROW_HEIGHT,
+            expand=True,
+            scroll_interval=100,
+            on_scroll=self.on_range_scroll,
+        )
+        self.range_header = self._make_range_row(["Дата", "День", "Приход", "Уход", "Часы"], bold=True)
+        self.range_container = ft.Column([self.range_header, self.range_list], expand=True, visible=False)
+        self.table_container = ft.Column([self.entries_table], scroll=ft.ScrollMode.ADAPTIVE, expand=True)
+        # Состояние постраничной загрузки: сотрудник, границы периода и ключ следующей страницы
+        self.range_employee_id = None
+        self.range_bounds = (None, None)
+        self.range_after = None
+        # Номер загрузки, страница которой сейчас читается (None - чтение не идет)
+        self.range_loading = None
+
+        # Пул строк таблицы месяца: строки создаются один раз и переиспользуются при смене месяца
+        self.row_pool = []
+        self.last_update_stats = None
+        # Номер последней запрошенной загрузки: результаты более старых загрузок не отображаются
+        self.load_generation = 0
+
         # Текстовые поля для итоговой сводки
         self.summary_text = ft.Column(
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
@@ -57,6 +116,8 @@ class HistoryView(ft.Column):
         self.selection_container = ft.Column(
             [
                 ft.Text("Выберите период для отчета", size=18, weight=ft.FontWeight.BOLD),
+                self.employee_dropdown,
+                self.period_dropdown,
                 ft.Row([self.year_dropdown, self.month_dropdown], alignment=ft.MainAxisAlignment.CENTER),
                 ft.FilledButton("Показать отчет", icon="summarize", on_click=self.show_report),
                 ft.OutlinedButton("На главный", icon="arrow_back", on_click=self.go_to_main),
@@ -73,7 +134,8 @@ class HistoryView(ft.Column):
                 content=ft.Column(
                     [
                         # Оборачиваем таблицу в Column, чтобы она корректно расширялась и скроллилась
-                        ft.Column([self.entries_table], scroll=ft.ScrollMode.ADAPTIVE, expand=True),
+                        self.table_container,
+                        self.range_container,
                         ft.Divider(),
                         self.summary_text,
                         ft.OutlinedButton("Назад к выбору", icon="arrow_back", on_click=self.show_selection),
@@ -90,82 +152,252 @@ class HistoryView(ft.Column):
             self.report_container,
         ]
 
-    def on_show(self):
+    async def on_show(self):
         """Вызывается при показе экрана, отображаем экран выбора."""
+        await self.employee_dropdown.load()
         self.show_selection()
 
-    def on_date_part_change(self, e):
-        """Вызывается при смене года или месяца."""
-        self.load_history()
+    async def on_date_part_change(self, e):
+        """
+        Вызывается при смене года или месяца. Быстрые переключения объединяются:
+        отчет строится только для последнего выбора.
+        """
+        generation = self._next_generation()
+        await asyncio.sleep(SELECTION_DEBOUNCE_SECONDS)
+        if generation == self.load_generation:
+            await self.load_history(generation)
+
+    def _next_generation(self):
+        """Начинает новую загрузку; все начатые ранее считаются устаревшими."""
+        self.load_generation += 1
+        return self.load_generation
+
+    async def on_period_change(self, e):
+        """Вызывается при смене периода: месяц для периода "Год" и "Все время" не нужен."""
+        self.month_dropdown.disabled = self.period_dropdown.value != "month"
+        self.year_dropdown.disabled = self.period_dropdown.value == "all"
+        self.update()
 
-    def load_history(self):
-        """Загружает и отображает историю и сводку за выбранный месяц."""
+    async def load_history(self, generation=None):
+        """Загружает и отображает историю и сводку за выбранный период."""
+        if generation is None:
+            generation = self._next_generation()
+        if self.period_dropdown.value == "month":
+            await self.load_month(generation)
+        else:
+            await self.load_range(generation)
+
+    async def load_month(self, generation):
+        """
+        Загружает и отображает историю и сводку за выбранный месяц.
+        После отображения в фоне готовятся отчеты соседних месяцев.
+        """
         year = int(self.year_dropdown.value)
         month = int(self.month_dropdown.value)
+        employee_id = current_employee_id(self.page)
         db = self.page.db_manager
 
         # Обновляем заголовок
         self.page.appbar.title = ft.Text(f"История за {month:02d}.{year}")
 
-        # 1. Загружаем и отображаем детальные записи
-        self.entries_table.rows.clear()
-        entries = db.get_entries_for_month(year, month)
-        lunch_hours = float(db.get_global_setting("lunch_duration_hours", 1.0))
-        days_map = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
-
-        for entry in entries:
-            start_dt = datetime.fromisoformat(entry['start_time'])
-            end_dt = datetime.fromisoformat(entry['end_time'])
-            duration_minutes = (end_dt - start_dt).total_seconds() / 60
-
-            # --- Используем ту же логику вычета обеда, что и в калькуляторе ---
-            lunch_minutes_to_deduct = 0
-            if duration_minutes >= 12 * 60:
-                lunch_minutes_to_deduct = lunch_hours * 60
-            elif duration_minutes >= 8 * 60:
-                lunch_minutes_to_deduct = lunch_hours * 60
-            elif duration_minutes >= 3 * 60:
-                lunch_minutes_to_deduct = 30
-            
-            duration_without_lunch_minutes = duration_minutes - lunch_minutes_to_deduct
-            duration_without_lunch_decimal = duration_without_lunch_minutes / 60.0
-
-            # Преобразуем десятичные часы в формат ЧЧ:ММ для отображения в таблице
-            day_hours = int(duration_without_lunch_decimal)
-            day_minutes = round((duration_without_lunch_decimal * 60) % 60)
-            
-            self.entries_table.rows.append(
-                ft.DataRow(cells=[
-                    ft.DataCell(ft.Text(start_dt.strftime("%d.%m"))),
-                    ft.DataCell(ft.Text(days_map[start_dt.weekday()])),
-                    ft.DataCell(ft.Text(start_dt.strftime("%H:%M"))),
-                    ft.DataCell(ft.Text(end_dt.strftime("%H:%M"))),
-                    ft.DataCell(ft.Text(f"{day_hours:02d}:{day_minutes:02d}")),
-                ])
-            )
+        # Строки по дням и сводка считаются за один проход по записям месяца
+        report = await db.read(build_month_report, year, month, employee_id=employee_id)
+        if generation != self.load_generation:
+            return # Пока отчет готовился, выбрали другой период
 
-        # 2. Рассчитываем и отображаем итоговую сводку
-        summary = calculate_monthly_summary(db, year, month)
-        self.summary_text.controls.clear()
-        
+        # 1. Отображаем детальные записи
+        row_values = []
+        for row in report['rows']:
+            # Преобразуем минуты в формат ЧЧ:ММ для отображения в таблице
+            day_hours, day_minutes = divmod(round(row['net_minutes']), 60)
+            row_values.append([
+                row['start'].strftime("%d.%m"),
+                DAYS_MAP[row['weekday']],
+                row['start'].strftime("%H:%M"),
+                row['end'].strftime("%H:%M"),
+                f"{day_hours:02d}:{day_minutes:02d}",
+            ])
+        stats = self._render_table_rows(row_values)
+
+        # 2. Отображаем итоговую сводку
+        summary = report['summary']
         # Преобразуем десятичные часы в формат ЧЧ:ММ для наглядности
         total_hours = int(summary['total_hours_without_lunch'])
         total_minutes = int((summary['total_hours_without_lunch'] * 60) % 60)
-        
-        self.summary_text.controls.extend([
-            ft.Text(f"Рабочих дней: {summary['work_days_count']}"),
-            ft.Text(f"Всего часов (без обеда): {total_hours} ч {total_minutes:02d} мин."),
-            ft.Text(f"Начислено (грязными): {summary['gross_pay']} руб."),
-            ft.Text(f"Аванс: {summary['advance']} руб."),
-            ft.Text(f"Налог (13%): {summary['tax_amount']} руб."),
-            ft.Text(f"К выплате: {summary['final_payout']} руб.", weight=ft.FontWeight.BOLD, size=16),
+        stats['summary_changed'] = self._render_summary([
+            f"Рабочих дней: {summary['work_days_count']}",
+            f"Всего часов (без обеда): {total_hours} ч {total_minutes:02d} мин.",
+            f"Начислено (грязными): {summary['gross_pay']} руб.",
+            f"Аванс: {summary['advance']} руб.",
+            f"Налог (13%): {summary['tax_amount']} руб.",
+            f"К выплате: {summary['final_payout']} руб.",
         ])
+        self.last_update_stats = stats
 
+        self.table_container.visible = True
+        self.range_container.visible = False
         self.update()
+        self.page.run_task(self.prefetch_adjacent_months, year, month, employee_id, generation)
+
+    async def prefetch_adjacent_months(self, year, month, employee_id, generation):
+        """
+        Фоновая задача: заранее строит отчеты следующего и предыдущего месяцев.
+        Отчеты сохраняются в ограниченном кэше db_manager.cache, поэтому переход
+        на соседний месяц не ждет базу и пересчета.
+        """
+        for delta in (1, -1):
+            if generation != self.load_generation:
+                return # Пользователь уже смотрит другой месяц
+            adjacent_year, adjacent_month = _shift_month(year, month, delta)
+            try:
+                await self.page.db_manager.read(
+                    build_month_report, adjacent_year, adjacent_month, employee_id=employee_id
+                )
+            except Exception as e:
+                print(f"Не удалось подготовить отчет за {adjacent_month:02d}.{adjacent_year}: {e}")
+
+    def _render_table_rows(self, row_values):
+        """
+        Выводит строки в таблицу месяца, переиспользуя уже созданные DataRow из пула.
+        Меняется текст только тех ячеек, значение которых отличается, поэтому при
+        переключении месяцев Flet отправляет клиенту лишь изменившиеся свойства,
+        а не всю таблицу заново.
+        :param row_values: списки текстов ячеек для каждой строки.
+        :return: статистика изменений: rows_added, rows_removed, cells_changed.
+        """
+        stats = {'rows_added': 0, 'rows_removed': 0, 'cells_changed': 0}
+        for index, values in enumerate(row_values):
+            if index == len(self.row_pool):
+                self.row_pool.append(ft.DataRow(cells=[ft.DataCell(ft.Text(value)) for value in values]))
+                continue
+            for cell, value in zip(self.row_pool[index].cells, values):
+                if cell.content.value != value:
+                    cell.content.value = value
+                    stats['cells_changed'] += 1
+
+        # В таблице остается столько строк пула, сколько дней в отчете
+        table_rows = self.entries_table.rows
+        count = len(row_values)
+        if len(table_rows) > count:
+            stats['rows_removed'] = len(table_rows) - count
+            del table_rows[count:]
+        elif len(table_rows) < count:
+            stats['rows_added'] = count - len(table_rows)
+            table_rows.extend(self.row_pool[len(table_rows):count])
+        return stats
+
+    def _render_summary(self, lines):
+        """
+        Выводит строки сводки в переиспользуемые текстовые поля; последняя строка - итог, выделяется.
+        :return: количество измененных или добавленных полей.
+        """
+        changed = 0
+        texts = self.summary_text.controls
+        for index, line in enumerate(lines):
+            weight = ft.FontWeight.BOLD if index == len(lines) - 1 else None
+            size = 16 if index == len(lines) - 1 else None
+            if index == len(texts):
+                texts.append(ft.Text(line, weight=weight, size=size))
+                changed += 1
+                continue
+            text = texts[index]
+            if (text.value, text.weight, text.size) != (line, weight, size):
+                text.value, text.weight, text.size = line, weight, size
+                changed += 1
+        if len(texts) > len(lines):
+            changed += len(texts) - len(lines)
+            del texts[len(lines):]
+        return changed
+
+    async def load_range(self, generation):
+        """
+        Загружает историю за год или за все время: сводку по предрасчитанным
+        итогам месяцев и первую страницу строк. Остальные страницы
+        подгружаются при прокрутке (см. on_range_scroll).
+        """
+        db = self.page.db_manager
+        self.range_employee_id = current_employee_id(self.page)
+        if self.period_dropdown.value == "year":
+            year = int(self.year_dropdown.value)
+            self.range_bounds = (date(year, 1, 1), date(year + 1, 1, 1))
+            start_month, end_month = (year, 1), (year, 12)
+            self.page.appbar.title = ft.Text(f"История за {year} год")
+        else:
+            self.range_bounds = (None, None)
+            start_month = end_month = None
+            self.page.appbar.title = ft.Text("История за все время")
+
+        summary = await db.read(calculate_range_summary, start_month, end_month, employee_id=self.range_employee_id)
+        if generation != self.load_generation:
+            return # Пока сводка готовилась, выбрали другой период
+        total_hours = int(summary['total_hours_without_lunch'])
+        total_minutes = int((summary['total_hours_without_lunch'] * 60) % 60)
+        self._render_summary([
+            f"Рабочих дней: {summary['work_days_count']}",
+            f"Всего часов (без обеда): {total_hours} ч {total_minutes:02d} мин.",
+            f"Начислено (грязными): {summary['gross_pay']} руб.",
+            f"Налог (13%): {summary['tax_amount']} руб.",
+            f"После налога (без учета авансов): {summary['net_pay']} руб.",
+        ])
+
+        self.range_list.controls.clear()
+        self.range_after = None
+        self.table_container.visible = False
+        self.range_container.visible = True
+        await self.load_range_page(generation, first=True)
+
+    async def load_range_page(self, generation, first=False):
+        """
+        Дописывает в список следующую страницу строк периода, открытого загрузкой generation.
+        Страница, прочитанная для уже закрытого периода, отбрасывается.
+        """
+        if generation != self.load_generation:
+            return
+        if not first and (self.range_loading == generation or self.range_after is None):
+            return
+        self.range_loading = generation
+        try:
+            start, end = self.range_bounds
+            page = await self.page.db_manager.read(
+                build_history_page, start, end, self.range_after, RANGE_PAGE_SIZE,
+                employee_id=self.range_employee_id,
+            )
+            if generation != self.load_generation:
+                return # Пока страница читалась, открыли другой период
+            self.range_after = page['after']
+            for row in page['rows']:
+                day_hours, day_minutes = divmod(round(row['net_minutes']), 60)
+                self.range_list.controls.append(self._make_range_row([
+                    row['start'].strftime("%d.%m.%Y"),
+                    DAYS_MAP[row['weekday']],
+                    row['start'].strftime("%H:%M"),
+                    row['end'].strftime("%H:%M"),
+                    f"{day_hours:02d}:{day_minutes:02d}",
+                ]))
+        finally:
+            if self.range_loading == generation:
+                self.range_loading = None
+        self.update()
+
+    async def on_range_scroll(self, e):
+        """Подгружает следующую страницу, когда прокрутка подходит к концу списка."""
+        if e.max_scroll_extent - e.pixels < RANGE_PREFETCH_ROWS * RANGE_ROW_HEIGHT:
+            await self.load_range_page(self.load_generation)
+
+    def _make_range_row(self, values, bold=False):
+        """Строка списка фиксированной высоты с колонками как в таблице месяца."""
+        weight = ft.FontWeight.BOLD if bold else None
+        return ft.Container(
+            height=RANGE_ROW_HEIGHT,
+            content=ft.Row(
+                [ft.Text(value, width=width, weight=weight) for value, width in zip(values, RANGE_COLUMN_WIDTHS)],
+                alignment=ft.MainAxisAlignment.CENTER,
+            ),
+        )
 
-    def show_report(self, e=None):
+    async def show_report(self, e=None):
         """Показывает контейнер с отчетом и скрывает выбор."""
-        self.load_history()
+        await self.load_history()
         self.selection_container.visible = False
         self.report_container.visible = True
         self.update()
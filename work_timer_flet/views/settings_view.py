@@ -1,5 +1,6 @@
 import flet as ft
 from datetime import datetime
+from views.employee_selector import EmployeeDropdown, current_employee_id
 
 class SettingsView(ft.Column):
     def __init__(self, switch_screen_func):
@@ -14,7 +15,11 @@ class SettingsView(ft.Column):
         self.spacing = 20
         self.expand = True
 
-        # --- Глобальные настройки ---
+        # --- Сотрудник: все настройки ниже относятся к нему ---
+        self.employee_dropdown = EmployeeDropdown(on_employee_change=self.on_employee_change, width=300)
+        self.new_employee_field = ft.TextField(label="Новый сотрудник", width=210)
+
+        # --- Общие настройки сотрудника ---
         self.lunch_duration_field = ft.TextField(
             label="Обед (часы, например 1 или 0.5)",
             width=300,
@@ -29,7 +34,7 @@ class SettingsView(ft.Column):
             options=[ft.dropdown.Option(str(y)) for y in range(current_year - 2, current_year + 3)],
             value=str(current_year),
         )
-        self.year_dropdown.on_change = self.on_date_part_change
+        self.year_dropdown.on_select = self.on_date_part_change
 
         self.month_dropdown = ft.Dropdown(
             label="Месяц",
@@ -37,7 +42,7 @@ class SettingsView(ft.Column):
             options=[ft.dropdown.Option(str(m), text=f"{m:02d}") for m in range(1, 13)],
             value=str(datetime.now().month),
         )
-        self.month_dropdown.on_change = self.on_date_part_change
+        self.month_dropdown.on_select = self.on_date_part_change
         self.hourly_rate_field = ft.TextField(
             label="Часовая ставка для выбранного месяца",
             width=300,
@@ -51,6 +56,14 @@ class SettingsView(ft.Column):
 
         # --- Элементы управления ---
         self.controls = [
+            self.employee_dropdown,
+            ft.Row(
+                [
+                    self.new_employee_field,
+                    ft.OutlinedButton("Добавить", icon="person_add", on_click=self.add_employee),
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+            ),
             ft.Text("Общие настройки", size=18, weight=ft.FontWeight.BOLD),
             self.lunch_duration_field,
             ft.Divider(),
@@ -68,29 +81,49 @@ class SettingsView(ft.Column):
             )
         ]
 
-    def on_show(self):
+    async def on_show(self):
         """Вызывается при показе экрана, загружаем все настройки."""
-        self.load_settings()
+        await self.load_settings()
 
-    def load_settings(self):
-        """Загружает глобальные и месячные настройки."""
+    async def load_settings(self):
+        """Загружает список сотрудников, общие и месячные настройки выбранного сотрудника."""
         db = self.page.db_manager
-        # Загружаем глобальные
-        lunch_hours = db.get_global_setting("lunch_duration_hours", 1.0)
+        await self.employee_dropdown.load()
+        # Загружаем общие настройки сотрудника
+        lunch_hours = await db.get_lunch_duration_hours(current_employee_id(self.page))
         self.lunch_duration_field.value = str(lunch_hours)
         # Загружаем для текущего выбранного месяца
-        self.load_monthly_settings()
+        await self.load_monthly_settings()
+
+    async def on_employee_change(self, e):
+        """Вызывается при выборе другого сотрудника."""
+        await self.load_settings()
+
+    async def add_employee(self, e):
+        """Добавляет сотрудника и сразу выбирает его."""
+        name = (self.new_employee_field.value or "").strip()
+        if not name:
+            return
+        try:
+            self.page.employee_id = await self.page.db_manager.add_employee(name)
+        except ValueError as ex:
+            self.page.snack_bar = ft.SnackBar(ft.Text(str(ex)), bgcolor="error")
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+        self.new_employee_field.value = ""
+        await self.load_settings()
 
-    def on_date_part_change(self, e):
+    async def on_date_part_change(self, e):
         """Вызывается при смене года или месяца."""
-        self.load_monthly_settings()
+        await self.load_monthly_settings()
 
-    def load_monthly_settings(self):
+    async def load_monthly_settings(self):
         """Загружает настройки для выбранного в Dropdown месяца."""
         db = self.page.db_manager
         year = int(self.year_dropdown.value)
         month = int(self.month_dropdown.value)
-        monthly_settings = db.get_settings_for_month(year, month)
+        monthly_settings = await db.get_settings_for_month(year, month, employee_id=current_employee_id(self.page))
         self.hourly_rate_field.value = str(monthly_settings.get("hourly_rate", 0.0))
         self.advance_field.value = str(monthly_settings.get("advance", 0.0))
         self.update()
@@ -98,14 +131,15 @@ class SettingsView(ft.Column):
     async def save_settings(self, e):
         """Сохраняет настройки из полей ввода."""
         db = self.page.db_manager
-        # Сохраняем глобальные
-        db.set_global_setting("lunch_duration_hours", float(self.lunch_duration_field.value or 1.0))
+        employee_id = current_employee_id(self.page)
+        # Сохраняем общие настройки сотрудника
+        await db.set_lunch_duration_hours(float(self.lunch_duration_field.value or 1.0), employee_id=employee_id)
         # Сохраняем месячные
         year = int(self.year_dropdown.value)
         month = int(self.month_dropdown.value)
         hourly_rate = float(self.hourly_rate_field.value or 0)
         advance = float(self.advance_field.value or 0)
-        db.save_settings_for_month(year, month, hourly_rate, advance)
+        await db.save_settings_for_month(year, month, hourly_rate, advance, employee_id=employee_id)
 
         # Показываем уведомление
         self.page.snack_bar = ft.SnackBar(content=ft.Text("Настройки сохранены!"))